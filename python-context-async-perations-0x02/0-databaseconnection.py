@@ -1,16 +1,113 @@
 import sqlite3
+import asyncio
+import threading
+import contextvars
 from datetime import datetime
 
+from pool import close_async_pools, get_async_pool, get_pool
+
+_local = threading.local()
+# pool id -> (connection, owning task, nesting depth) for async blocks
+_async_active = contextvars.ContextVar("async_active", default={})
+
+
 class DatabaseConnection(object):
+    """
+    Opens a connection to database for the block and closes it on exit.
+
+    With pooled=True (or a ConnectionPool as pool) the connection is
+    checked out from the shared pool instead and returned on exit, with
+    uncommitted work rolled back. Nested pooled blocks in the same thread
+    reuse the outer block's connection inside a SAVEPOINT, which is
+    released on success and rolled back on error. A commit() inside a
+    nested block commits the outer block's work too and ends the
+    savepoint.
 
-    def __init__(self):
+    `async with` always checks out an aiosqlite connection from the
+    shared AsyncConnectionPool (or async_pool), with the same rollback
+    and nesting rules within one task.
+    """
+
+    def __init__(self, database='users.db', pooled=False, pool=None, async_pool=None):
         self.conn = None
         self.current_time = datetime.now()
+        self.database = database
+        self.pool = pool
+        if pooled and pool is None:
+            self.pool = get_pool(database)
+        self.async_pool = async_pool
+        self.savepoint = None
+        self._token = None
+
+    def _active(self):
+        if not hasattr(_local, "active"):
+            _local.active = {}
+        return _local.active
+
+    def _enter_pooled(self):
+        active = self._active()
+        entry = active.get(id(self.pool))
+        if entry is None:
+            self.conn = self.pool.acquire()
+            active[id(self.pool)] = [self.conn, 0]
+            return self.conn
+        self.conn = entry[0]
+        entry[1] += 1
+        self.savepoint = f"nested_{entry[1]}"
+        if not self.conn.in_transaction:
+            # keep RELEASE from committing: the outer block owns the transaction
+            self.conn.execute("BEGIN")
+        self.conn.execute(f"SAVEPOINT {self.savepoint}")
+        return self.conn
+
+    def _exit_pooled(self, failed):
+        active = self._active()
+        entry = active[id(self.pool)]
+        if self.savepoint is None:
+            del active[id(self.pool)]
+            self.pool.release(self.conn)
+            return
+        entry[1] -= 1
+        if not self.conn.in_transaction:
+            return  # committed inside the block, which ended the savepoint
+        if failed:
+            self.conn.execute(f"ROLLBACK TO {self.savepoint}")
+        self.conn.execute(f"RELEASE {self.savepoint}")
+
+    async def __aenter__(self):
+        pool = self.async_pool = self.async_pool or get_async_pool(self.database)
+        active = _async_active.get()
+        entry = active.get(id(pool))
+        task = asyncio.current_task()
+        if entry is None or entry[1] is not task:
+            self.conn = await pool.acquire()
+            self._token = _async_active.set({**active, id(pool): (self.conn, task, 0)})
+            return self.conn
+        self.conn, _, depth = entry
+        self._token = _async_active.set({**active, id(pool): (self.conn, task, depth + 1)})
+        self.savepoint = f"nested_{depth + 1}"
+        if not self.conn.in_transaction:
+            await self.conn.execute("BEGIN")
+        await self.conn.execute(f"SAVEPOINT {self.savepoint}")
+        return self.conn
+
+    async def __aexit__(self, type, value, traceback):
+        _async_active.reset(self._token)
+        if self.savepoint is None:
+            await self.async_pool.release(self.conn, discard=type is asyncio.CancelledError)
+            return
+        if not self.conn.in_transaction:
+            return
+        if type is not None:
+            await self.conn.execute(f"ROLLBACK TO {self.savepoint}")
+        await self.conn.execute(f"RELEASE {self.savepoint}")
 
     def __enter__(self):
+        if self.pool is not None:
+            return self._enter_pooled()
         try:
             print(f"{self.current_time.strftime("%H:%M:%S")}: Connecting to the database.")
-            self.conn = sqlite3.connect('users.db')
+            self.conn = sqlite3.connect(self.database)
             print(f"{self.current_time.strftime("%H:%M:%S")}: Connected Succesfully!.")
             return self.conn
         except Exception as e:
@@ -18,10 +115,27 @@ class DatabaseConnection(object):
             raise e
 
     def __exit__(self, type, value, traceback):
+        if self.pool is not None:
+            self._exit_pooled(type is not None)
+            return
         self.conn.close()
         print(f"{self.current_time.strftime("%H:%M:%S")}: Connection Closed Succesfully!.")
 
-with DatabaseConnection() as conn:
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    print(cursor.fetchall())
+
+if __name__ == "__main__":
+    with DatabaseConnection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users")
+        print(cursor.fetchall())
+
+    with DatabaseConnection(pooled=True) as conn:
+        with DatabaseConnection(pooled=True) as nested:
+            print(nested is conn, nested.execute("SELECT COUNT(*) FROM users").fetchone())
+
+    async def fetch_users():
+        async with DatabaseConnection() as conn:
+            async with conn.execute("SELECT * FROM users") as cursor:
+                print(await cursor.fetchall())
+        await close_async_pools()
+
+    asyncio.run(fetch_users())
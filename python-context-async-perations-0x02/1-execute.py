@@ -1,30 +1,137 @@
 import sqlite3
+import asyncio
 from datetime import datetime
 
+from pool import close_async_pools, get_async_pool
+
 class ExecuteQuery(object):
-    def __init__(self, query, params=()):
+    """
+    Runs a query on entering and returns its rows.
+
+    By default the rows are fetched into a list. With stream=True an
+    iterator is returned instead, reading arraysize rows at a time while
+    the block is open; the cursor and connection are closed on exit.
+    max_rows is a guard for the default mode: once a result grows past
+    it, the rows fetched so far are chained with the rest of the cursor
+    and streamed rather than materialized.
+
+    `async with` runs the query on a connection from the shared
+    AsyncConnectionPool (or async_pool) and returns a list or, streaming,
+    an async iterator for `async for`; the connection goes back to the
+    pool on exit.
+    """
+
+    def __init__(self, query, params=(), stream=False, arraysize=1000,
+                 max_rows=None, database='users.db', async_pool=None):
         self.current_time = datetime.now()
         self.conn = None
+        self.cursor = None
         self.query = query
         self.params = params
+        self.stream = stream
+        self.arraysize = arraysize
+        self.max_rows = max_rows
+        self.database = database
+        self.async_pool = async_pool
+        self.streamed = False
+
+    def _rows(self, head=()):
+        yield from head
+        while True:
+            rows = self.cursor.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
+    async def _async_rows(self, head=()):
+        for row in head:
+            yield row
+        while True:
+            rows = await self.cursor.fetchmany(self.arraysize)
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    async def __aenter__(self):
+        self.async_pool = self.async_pool or get_async_pool(self.database)
+        self.conn = await self.async_pool.acquire()
+        try:
+            self.cursor = await self.conn.execute(self.query, self.params)
+            if self.stream:
+                self.streamed = True
+                return self._async_rows()
+            if self.max_rows is None:
+                return await self.cursor.fetchall()
+            result = await self.cursor.fetchmany(self.max_rows + 1)
+            if len(result) > self.max_rows:
+                self.streamed = True
+                return self._async_rows(result)
+            return result
+        except BaseException as e:
+            # __aexit__ does not run when __aenter__ raises
+            await self.async_pool.release(
+                self.conn, discard=isinstance(e, asyncio.CancelledError))
+            raise
+
+    async def __aexit__(self, type, value, traceback):
+        cancelled = type is asyncio.CancelledError
+        try:
+            if not cancelled:
+                await self.cursor.close()
+        finally:
+            await self.async_pool.release(self.conn, discard=cancelled)
 
     def __enter__(self):
         try:
             print(f"{self.current_time.strftime("%H:%M:%S")}: Connecting to the database.")
-            self.conn = sqlite3.connect('users.db')
+            self.conn = sqlite3.connect(self.database)
             self.cursor = self.conn.cursor()
+            self.cursor.arraysize = self.arraysize
             self.cursor.execute(self.query, self.params)
-            result = self.cursor.fetchall()
             print(f"{self.current_time.strftime("%H:%M:%S")}: Connected Succesfully!.")
-            print(f"{self.current_time.strftime("%H:%M:%S")}: Results: {result}")
-            return result
         except Exception as e:
             print(f"Error occured while connecting to the database: {e}")
+            if self.conn is not None:
+                self.conn.close()
             raise e
 
+        if self.stream:
+            self.streamed = True
+            return self._rows()
+        try:
+            if self.max_rows is None:
+                result = self.cursor.fetchall()
+            else:
+                result = self.cursor.fetchmany(self.max_rows + 1)
+                if len(result) > self.max_rows:
+                    self.streamed = True
+                    print(f"{self.current_time.strftime('%H:%M:%S')}: More than {self.max_rows} rows, streaming results.")
+                    return self._rows(result)
+        except BaseException:
+            self.conn.close()
+            raise
+        print(f"{self.current_time.strftime("%H:%M:%S")}: Results: {result}")
+        return result
+
     def __exit__(self, type, value, traceback):
+        self.cursor.close()
         self.conn.close()
         print(f"{self.current_time.strftime("%H:%M:%S")}: Connection Closed Succesfully!.")
 
-with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
-    print(results)
+
+if __name__ == "__main__":
+    with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
+        print(results)
+
+    with ExecuteQuery("SELECT * FROM users", stream=True, arraysize=500) as rows:
+        for row in rows:
+            print(row)
+
+    async def print_users():
+        async with ExecuteQuery("SELECT * FROM users", stream=True) as rows:
+            async for row in rows:
+                print(row)
+        await close_async_pools()
+
+    asyncio.run(print_users())
@@ -1,22 +1,29 @@
 import asyncio
-import aiosqlite
+
+from executor import AsyncQueryExecutor
+from pool import close_async_pools
+
+async def _fetch(sql):
+    rows, = await AsyncQueryExecutor(timeout=5.0).run([sql])
+    if isinstance(rows, Exception):
+        raise rows
+    return rows
 
 async def async_fetch_users():
-    async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            results = await cursor.fetchall()
-            print(f"All users: {results}")
-            return results
+    results = await _fetch("SELECT * FROM users")
+    print(f"All users: {results}")
+    return results
 
 async def async_fetch_older_users():
-    async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
-            results = await cursor.fetchall()
-            print(f"Users older than 40: {results}")
-            return results
+    results = await _fetch("SELECT * FROM users WHERE age > 40")
+    print(f"Users older than 40: {results}")
+    return results
 
 async def fetch_concurrently():
-    await asyncio.gather(async_fetch_users(), async_fetch_older_users())
+    try:
+        return await asyncio.gather(async_fetch_users(), async_fetch_older_users())
+    finally:
+        await close_async_pools()
 
 
 if __name__ == "__main__":
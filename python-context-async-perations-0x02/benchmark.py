@@ -0,0 +1,46 @@
+import sys
+import time
+import asyncio
+
+import aiosqlite
+
+from executor import AsyncQueryExecutor
+from pool import AsyncConnectionPool
+
+DATABASE = 'users.db'
+
+
+async def _connection_per_query(database, queries):
+    async def fetch(sql, params):
+        async with aiosqlite.connect(database) as db:
+            async with db.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+    return await asyncio.gather(*(fetch(sql, params) for sql, params in queries))
+
+
+async def _pooled(database, queries, pool_size):
+    async with AsyncConnectionPool(database, max_size=pool_size) as pool:
+        return await AsyncQueryExecutor(pool, timeout=30.0).run(queries)
+
+
+def benchmark_concurrent_queries(count=500, pool_sizes=(1, 4, 8), database=DATABASE):
+    """
+    Runs `count` concurrent point lookups by id, first with a connection
+    per query and a bare gather, then through AsyncQueryExecutor over
+    pools of each size.
+    """
+    queries = [("SELECT * FROM users WHERE id = ?", (i % 3 + 1,)) for i in range(count)]
+
+    print(f"{'mode':>22} {'queries':>8} {'time (ms)':>10} {'queries/s':>10}")
+    runs = [("connection per query", lambda: _connection_per_query(database, queries))]
+    runs += [(f"executor, pool of {size}", lambda size=size: _pooled(database, queries, size))
+             for size in pool_sizes]
+    for label, run in runs:
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        print(f"{label:>22} {count:>8} {elapsed * 1000:>10.2f} {count / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    benchmark_concurrent_queries(database=sys.argv[1] if len(sys.argv) > 1 else DATABASE)
@@ -0,0 +1,87 @@
+import asyncio
+
+from pool import get_async_pool
+
+
+class AsyncQueryExecutor(object):
+    """
+    Runs many queries concurrently over a shared AsyncConnectionPool.
+
+    At most `concurrency` queries run at once (default: the pool size).
+    Each query is a SQL string or a (sql, params) pair and may take at
+    most `timeout` seconds; a query that times out is interrupted and its
+    connection discarded. With fail_fast=True the first failure cancels
+    every query still pending and is raised.
+    """
+
+    def __init__(self, pool=None, concurrency=None, timeout=None, fail_fast=False,
+                 database='users.db'):
+        self.pool = pool
+        self.database = database
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.fail_fast = fail_fast
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    async def _fetch(self, conn, sql, params):
+        # no `async with`: closing the cursor on cancellation would queue
+        # behind the very query being abandoned
+        cursor = await conn.execute(sql, params)
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return rows
+
+    async def _run_one(self, pool, semaphore, index, query):
+        sql, params = (query, ()) if isinstance(query, str) else query
+        async with semaphore:
+            conn = await pool.acquire()
+            interrupted = False
+            try:
+                rows = await asyncio.wait_for(self._fetch(conn, sql, params), self.timeout)
+            except asyncio.CancelledError:
+                interrupted = True
+                raise
+            except asyncio.TimeoutError as e:
+                interrupted = True
+                self.timed_out += 1
+                return index, None, e
+            except Exception as e:
+                self.failed += 1
+                return index, None, e
+            finally:
+                await pool.release(conn, discard=interrupted)
+        self.completed += 1
+        return index, rows, None
+
+    async def stream(self, queries):
+        """
+        Yields (index, rows, error) for each query as soon as it completes,
+        index being its position in queries and error None on success.
+        """
+        pool = self.pool or get_async_pool(self.database)
+        semaphore = asyncio.Semaphore(self.concurrency or pool.max_size)
+        tasks = [asyncio.ensure_future(self._run_one(pool, semaphore, i, query))
+                 for i, query in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, rows, error = await next_done
+                if error is not None and self.fail_fast:
+                    raise error
+                yield index, rows, error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, queries):
+        """
+        Runs every query and returns their rows in order; failed queries
+        get their exception in place of rows.
+        """
+        queries = list(queries)
+        results = [None] * len(queries)
+        async for index, rows, error in self.stream(queries):
+            results[index] = rows if error is None else error
+        return results
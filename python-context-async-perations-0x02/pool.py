@@ -0,0 +1,271 @@
+import time
+import weakref
+import asyncio
+import sqlite3
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no connection could be checked out in time."""
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of sqlite3 connections to one database.
+
+    Checkouts reuse an idle connection, open a new one while fewer than
+    max_size exist, and otherwise wait up to timeout seconds for one to
+    be released. Released connections have uncommitted work rolled back.
+    """
+
+    def __init__(self, database='users.db', max_size=5, timeout=5.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.created = 0
+        self.reused = 0
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Checks out a connection. A new one is opened outside the lock (its
+        slot is reserved first), so a slow connect does not stall other
+        checkouts and releases.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if self._idle:
+                    self.reused += 1
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No connection available after {timeout}s")
+                self._lock.wait(remaining)
+        try:
+            conn = sqlite3.connect(self.database, check_same_thread=False)
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                self._size -= 1
+                conn.close()
+                self._lock.notify()
+                return
+            if self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._lock.notify()
+
+    def close(self):
+        """
+        Closes idle connections; busy ones are closed when released.
+        """
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+            self._lock.notify_all()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database='users.db'):
+    """
+    Returns the process-wide pool for database, creating it on first use.
+    """
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = _pools[database] = ConnectionPool(database)
+        return pool
+
+
+class AsyncConnectionPool(object):
+    """
+    asyncio pool of aiosqlite connections to one database. At most
+    max_size connections exist; further checkouts wait on a semaphore
+    without blocking the loop. A pool belongs to the event loop it is
+    first used on and must be closed before that loop ends.
+    """
+
+    def __init__(self, database='users.db', max_size=5):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.database = database
+        self.max_size = max_size
+        self.created = 0
+        self.reused = 0
+        self._idle = []
+        self._available = asyncio.Semaphore(max_size)
+        self._closed = False
+
+    async def acquire(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        await self._available.acquire()
+        try:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+            import aiosqlite
+            # a connect cancelled midway stops its own thread
+            conn = await aiosqlite.connect(self.database)
+            try:
+                conn.aborted = False
+                await conn.set_progress_handler(lambda: conn.aborted, 1000)
+            except BaseException:
+                # shielded: a cancelled checkout must still close its
+                # connection, or the worker thread keeps the process alive
+                await asyncio.shield(self._abort(conn))
+                raise
+            self.created += 1
+            return conn
+        except BaseException:
+            self._available.release()
+            raise
+
+    async def release(self, conn, discard=False):
+        """
+        Returns conn, rolling back uncommitted work. discard=True closes
+        it instead, interrupting any query still running on it. Shielded,
+        so a caller cancelled meanwhile cannot strand the connection.
+        """
+        await asyncio.shield(self._release(conn, discard))
+
+    async def _release(self, conn, discard):
+        try:
+            if discard:
+                await self._abort(conn)
+                return
+            if not self._closed:
+                try:
+                    if conn.in_transaction:
+                        await conn.rollback()
+                    self._idle.append(conn)
+                    return
+                except sqlite3.Error:
+                    pass
+            await conn.close()
+        finally:
+            self._available.release()
+
+    async def _abort(self, conn):
+        """
+        Closes conn. The progress handler set in acquire() stops whatever
+        query is running or still queued on it as soon as it sees the
+        flag, so the close does not wait for that query to finish.
+        """
+        conn.aborted = True
+        try:
+            await conn.close()
+        except sqlite3.Error:
+            pass
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        cancelled = False
+        try:
+            yield conn
+        except asyncio.CancelledError:
+            cancelled = True   # a query may still be running on conn
+            raise
+        finally:
+            await self.release(conn, discard=cancelled)
+
+    async def close(self):
+        """
+        Closes idle connections; busy ones are closed when released.
+        """
+        self._closed = True
+        while self._idle:
+            await self._idle.pop().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+
+_async_pools = weakref.WeakKeyDictionary()   # event loop -> {database: pool}
+_closers = weakref.WeakKeyDictionary()       # event loop -> _close_with_loop generator
+
+
+async def _close_with_loop(pools):
+    """
+    Parked at its yield for the life of the loop: asyncio.run() finalizes
+    async generators before closing the loop, which closes the loop's
+    pools, so their aiosqlite threads do not keep the interpreter alive.
+    """
+    try:
+        yield
+    finally:
+        for pool in list(pools.values()):
+            await pool.close()
+
+
+async def _park(agen):
+    await agen.asend(None)
+
+
+def get_async_pool(database='users.db'):
+    """
+    Returns the shared async pool for database on the running loop. The
+    loop's pools are closed when asyncio.run() ends it, or earlier by
+    close_async_pools().
+    """
+    loop = asyncio.get_running_loop()
+    pools = _async_pools.get(loop)
+    if pools is None:
+        pools = _async_pools[loop] = {}
+        # the loop only holds async generators weakly
+        closer = _close_with_loop(pools)
+        _closers[loop] = closer
+        loop.create_task(_park(closer))
+    pool = pools.get(database)
+    if pool is None:
+        pool = pools[database] = AsyncConnectionPool(database)
+    return pool
+
+
+async def close_async_pools():
+    """
+    Closes the running loop's shared async pools, for loops not run by
+    asyncio.run(); the next get_async_pool() starts new ones.
+    """
+    loop = asyncio.get_running_loop()
+    _closers.pop(loop, None)
+    pools = _async_pools.pop(loop, {})
+    for pool in pools.values():
+        await pool.close()
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+
+from executor import AsyncQueryExecutor
+from pool import close_async_pools, get_async_pool
+
+
+def worker_threads():
+    return [thread for thread in threading.enumerate()
+            if "_connection_worker_thread" in thread.name]
+
+
+class TestAsyncPoolCleanup(unittest.TestCase):
+    """Cancelled checkouts must not leave aiosqlite threads behind."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "users.db")
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO users (name) VALUES (?)",
+                         [(f"user{i}",) for i in range(100)])
+        conn.commit()
+        conn.close()
+
+    def test_no_threads_left_after_fail_fast(self):
+        async def main():
+            await AsyncQueryExecutor(database=self.database).run(["SELECT nope"])
+            executor = AsyncQueryExecutor(fail_fast=True, database=self.database)
+            with self.assertRaises(sqlite3.OperationalError):
+                async for _ in executor.stream(["SELECT nope"] + ["SELECT * FROM users"] * 20):
+                    pass
+            await close_async_pools()
+
+        asyncio.run(main())
+        deadline = time.monotonic() + 2
+        while worker_threads() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(worker_threads(), [])
+
+    def test_shared_pools_close_with_the_loop(self):
+        async def main():
+            async with get_async_pool(self.database).connection() as conn:
+                async with conn.execute("SELECT COUNT(*) FROM users") as cursor:
+                    self.assertEqual(await cursor.fetchone(), (100,))
+
+        asyncio.run(main())   # no close_async_pools()
+        deadline = time.monotonic() + 2
+        while worker_threads() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(worker_threads(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,6 @@
 import sqlite3
-import functools
-from datetime import datetime
 
-#### decorator to lof SQL queries
-
-def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        current_time = datetime.now()
-        print(f"{current_time.strftime("%H:%M:%S")}: Executing query '{kwargs['query']}'")
-        print(f"Results: {func(*args, **kwargs)}")
-    return wrapper
+from query_log import log_queries
 
 @log_queries
 def fetch_all_users(query):
@@ -0,0 +1,102 @@
+import os
+import time
+import shutil
+import asyncio
+import sqlite3
+import tempfile
+import threading
+
+import connection
+from query_cache import QueryCache, cache_query
+
+DATABASE = 'users.db'
+
+
+def benchmark_thundering_herd(callers=50, query_seconds=0.05, database=DATABASE):
+    """
+    Fires `callers` concurrent identical queries at a cold cache and
+    counts how many reach the database, for threads and for asyncio.
+    query_seconds stretches each query so the callers overlap.
+    """
+    executions = {"threads": 0, "asyncio": 0}
+    lock = threading.Lock()
+
+    @cache_query(cache=QueryCache())
+    def fetch_users(conn, query):
+        with lock:
+            executions["threads"] += 1
+        time.sleep(query_seconds)
+        return conn.execute(query).fetchall()
+
+    def call():
+        conn = sqlite3.connect(database)
+        fetch_users(conn, query="SELECT * FROM users")
+        conn.close()
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    thread_time = time.perf_counter() - start
+
+    @cache_query(cache=QueryCache())
+    async def fetch_users_async(conn, query):
+        executions["asyncio"] += 1
+        await asyncio.sleep(query_seconds)
+        return conn.execute(query).fetchall()
+
+    async def herd():
+        conn = sqlite3.connect(database)
+        await asyncio.gather(*(fetch_users_async(conn, query="SELECT * FROM users")
+                               for _ in range(callers)))
+        conn.close()
+
+    start = time.perf_counter()
+    asyncio.run(herd())
+    async_time = time.perf_counter() - start
+
+    print(f"{'mode':>8} {'callers':>8} {'db calls':>9} {'time (ms)':>10}")
+    print(f"{'threads':>8} {callers:>8} {executions['threads']:>9} {thread_time * 1000:>10.2f}")
+    print(f"{'asyncio':>8} {callers:>8} {executions['asyncio']:>9} {async_time * 1000:>10.2f}")
+
+
+def benchmark_pragmas(reads=20000, writes=2000, database=DATABASE):
+    """
+    Read and write throughput of connections from connection.connect
+    with SQLite defaults and with connection.TUNED, each on its own copy
+    of the database. Reads are point lookups by id on one connection;
+    writes are single-row updates, each committed on its own.
+    """
+    print(f"{'settings':>8} {'reads/s':>10} {'writes/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, options in (("default", {}), ("tuned", connection.TUNED)):
+            path = os.path.join(tmp, f"{label}.db")
+            shutil.copyfile(database, path)
+            connection.configure_connections(reset=True, **options)
+            conn = connection.connect(path)
+            try:
+                ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+
+                start = time.perf_counter()
+                for i in range(reads):
+                    conn.execute("SELECT * FROM users WHERE id = ?",
+                                 (ids[i % len(ids)],)).fetchone()
+                read_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for i in range(writes):
+                    conn.execute("UPDATE users SET age = age WHERE id = ?",
+                                 (ids[i % len(ids)],))
+                    conn.commit()
+                write_time = time.perf_counter() - start
+            finally:
+                conn.close()
+            print(f"{label:>8} {reads / read_time:>10.0f} {writes / write_time:>10.0f}")
+    connection.configure_connections(reset=True)
+
+
+if __name__ == "__main__":
+    benchmark_thundering_herd()
+    benchmark_pragmas()
@@ -0,0 +1,231 @@
+import time
+import atexit
+import sqlite3
+import functools
+import threading
+from concurrent.futures import Future
+
+import connection
+from query_cache import is_write, query_cache, tables_in
+
+
+class WriteCoalescer(object):
+    """
+    Buffers write calls and runs them in batches, one transaction per
+    batch, on a background thread with its own connection.
+
+    A batch is flushed when max_batch calls are waiting or max_delay
+    seconds after its first call, whichever comes first. Each call gets
+    a Future resolved with its own result or error.
+
+    With sql set, the decorated function only maps its arguments to the
+    statement's parameters and the whole batch goes through a single
+    executemany. Otherwise each call's body runs against the shared
+    connection. Either way a failing call is rolled back on its own
+    (SAVEPOINT) and the rest of the batch still commits.
+    """
+
+    def __init__(self, func, sql=None, max_batch=100, max_delay=0.05,
+                 database='users.db', connect=None, cache=None):
+        self.func = func
+        self.sql = sql
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = query_cache if cache is None else cache
+        self._connect = connect or (lambda: connection.connect(database))
+        self._pending = []
+        self._first_at = None
+        self._closed = False
+        self._error = None      # why the writer thread stopped, if it failed
+        self._lock = threading.Condition()
+        self.batches = 0
+        self.calls = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._error is not None:
+                future.set_exception(self._error)
+                return future
+            if self._closed:
+                raise RuntimeError("write coalescer is closed")
+            if not self._pending:
+                self._first_at = time.monotonic()
+                self._lock.notify()   # wake an idle writer into its timed wait
+            self._pending.append((args, kwargs, future))
+            if len(self._pending) >= self.max_batch:
+                self._lock.notify()
+        return future
+
+    def flush(self):
+        """
+        Flushes whatever is buffered and waits for it to be written.
+        """
+        with self._lock:
+            futures = [future for _, _, future in self._pending]
+            self._first_at = float("-inf")
+            self._lock.notify()
+        for future in futures:
+            future.exception()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+        self._thread.join()
+
+    def _take_batch(self):
+        with self._lock:
+            while True:
+                if self._pending:
+                    due = self._first_at + self.max_delay
+                    remaining = due - time.monotonic()
+                    if len(self._pending) >= self.max_batch or remaining <= 0 or self._closed:
+                        batch = self._pending[:self.max_batch]
+                        del self._pending[:self.max_batch]
+                        if self._pending:
+                            self._first_at = time.monotonic()
+                        return batch
+                    self._lock.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._lock.wait()
+
+    def _fail(self, error, batch=()):
+        """
+        The writer thread cannot go on: closes the coalescer and fails the
+        batch in hand, everything still buffered and every later call.
+        """
+        with self._lock:
+            self._error = error
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._lock.notify_all()
+        for _, _, future in list(batch) + pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            self._fail(e)
+            return
+        conn.isolation_level = None  # transactions are managed explicitly
+        written = set()
+
+        def trace(statement):
+            if is_write(statement):
+                written.update(tables_in(statement))
+
+        conn.set_trace_callback(trace)
+        batch = ()
+        try:
+            while True:
+                batch = self._take_batch()
+                if batch is None:
+                    return
+                written.clear()
+                self._write(conn, batch)
+                self.cache.invalidate_tables(written)
+        except Exception as e:
+            self._fail(e, batch)
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        calls = [(args, kwargs, future) for args, kwargs, future in batch
+                 if future.set_running_or_notify_cancel()]
+        if not calls:
+            return
+        results = {}
+        conn.execute("BEGIN")
+        try:
+            if self.sql is None or not self._executemany(conn, calls, results):
+                self._one_by_one(conn, calls, results)
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            for _, _, future in calls:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.calls += len(calls)
+        for _, _, future in calls:
+            outcome, value = results[id(future)]
+            if outcome == "ok":
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _executemany(self, conn, calls, results):
+        """
+        Fast path: the whole batch in one executemany. Returns False when
+        it fails, so the batch is retried call by call to find the culprit.
+        """
+        rows = []
+        for args, kwargs, future in calls:
+            try:
+                rows.append(self.func(conn, *args, **kwargs))
+            except Exception as e:
+                results[id(future)] = ("error", e)
+        conn.execute("SAVEPOINT coalesced_batch")
+        try:
+            conn.executemany(self.sql, rows)
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO coalesced_batch")
+            conn.execute("RELEASE coalesced_batch")
+            results.clear()
+            return False
+        conn.execute("RELEASE coalesced_batch")
+        for _, _, future in calls:
+            results.setdefault(id(future), ("ok", None))
+        return True
+
+    def _one_by_one(self, conn, calls, results):
+        for args, kwargs, future in calls:
+            conn.execute("SAVEPOINT coalesced_call")
+            try:
+                if self.sql is None:
+                    value = self.func(conn, *args, **kwargs)
+                else:
+                    conn.execute(self.sql, self.func(conn, *args, **kwargs))
+                    value = None
+            except Exception as e:
+                conn.execute("ROLLBACK TO coalesced_call")
+                results[id(future)] = ("error", e)
+            else:
+                results[id(future)] = ("ok", value)
+            conn.execute("RELEASE coalesced_call")
+
+
+def coalesce_writes(sql=None, max_batch=100, max_delay=0.05, database='users.db',
+                    connect=None, cache=None):
+    """
+    Batches calls to a write function into shared transactions.
+
+    The decorated function keeps its arguments but returns a Future
+    instead of running immediately; wrapper.flush() forces a write and
+    wrapper.coalescer exposes the underlying WriteCoalescer.
+
+        @coalesce_writes(sql="UPDATE users SET email = ? WHERE id = ?")
+        def update_user_email(conn, user_id, new_email):
+            return (new_email, user_id)
+
+        futures = [update_user_email(user_id=i, new_email=e) for i, e in changes]
+    """
+    def decorator(func):
+        coalescer = WriteCoalescer(func, sql, max_batch, max_delay, database,
+                                   connect, cache)
+        atexit.register(coalescer.close)
+
+        @functools.wraps(func)
+        def coalescing_wrapper(*args, **kwargs):
+            return coalescer.submit(*args, **kwargs)
+        coalescing_wrapper.flush = coalescer.flush
+        coalescing_wrapper.coalescer = coalescer
+        return coalescing_wrapper
+    return decorator
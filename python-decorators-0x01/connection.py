@@ -0,0 +1,222 @@
+import time
+import sqlite3
+import inspect
+import functools
+import itertools
+import threading
+import contextvars
+from collections import Counter
+
+from query_cache import is_read, query_of
+
+PRAGMAS = ("journal_mode", "synchronous", "mmap_size", "cache_size",
+           "busy_timeout", "temp_store")
+
+# A read-heavy, single-host profile: WAL lets readers run alongside the
+# writer, synchronous=NORMAL skips the fsync per commit that WAL does not
+# need for consistency, and a bigger page cache / mmap avoid read syscalls.
+TUNED = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,   # negative means KiB: 64 MiB
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+    "cached_statements": 512,
+}
+
+
+class ConnectionSettings(object):
+    """
+    How every decorator opens its SQLite connections. None leaves the
+    SQLite default in place. cached_statements sizes each connection's
+    prepared statement cache, so repeated queries skip re-parsing.
+    """
+
+    def __init__(self, cached_statements=128, **pragmas):
+        self.cached_statements = cached_statements
+        self.pragmas = dict.fromkeys(PRAGMAS)
+        self.update(**pragmas)
+
+    def update(self, cached_statements=None, **pragmas):
+        for name in pragmas:
+            if name not in PRAGMAS:
+                raise ValueError(f"Unsupported pragma: {name}")
+        if cached_statements is not None:
+            self.cached_statements = cached_statements
+        self.pragmas.update(pragmas)
+
+    def statements(self):
+        return [f"PRAGMA {name} = {value}"
+                for name, value in self.pragmas.items() if value is not None]
+
+
+settings = ConnectionSettings()
+
+
+def configure_connections(reset=False, **options):
+    """
+    Configures connections opened from now on by with_db_connection, the
+    pools and the write coalescer, e.g. configure_connections(**TUNED).
+    """
+    global settings
+    if reset:
+        settings = ConnectionSettings()
+    settings.update(**options)
+    return settings
+
+
+def _open_args(database, read_only, kwargs):
+    """
+    Read-only connections go through a mode=ro URI and skip journal_mode,
+    which only a writer can change.
+    """
+    kwargs.setdefault("cached_statements", settings.cached_statements)
+    statements = settings.statements()
+    if read_only:
+        if not database.startswith("file:"):
+            database = f"file:{database}?mode=ro"
+        kwargs["uri"] = True
+        statements = [s for s in statements if not s.startswith("PRAGMA journal_mode")]
+    return database, statements
+
+
+def connect(database='users.db', read_only=False, **kwargs):
+    """
+    sqlite3.connect with the configured statement cache and pragmas.
+    """
+    database, statements = _open_args(database, read_only, kwargs)
+    conn = sqlite3.connect(database, **kwargs)
+    for statement in statements:
+        conn.execute(statement)
+    return conn
+
+
+async def connect_async(database='users.db', read_only=False, **kwargs):
+    """
+    aiosqlite counterpart of connect.
+    """
+    import aiosqlite
+    database, statements = _open_args(database, read_only, kwargs)
+    conn = await aiosqlite.connect(database, **kwargs)
+    for statement in statements:
+        await conn.execute(statement)
+    return conn
+
+
+_last_commit = contextvars.ContextVar("last_commit", default=float("-inf"))
+
+
+def mark_committed():
+    """
+    Records that the current thread/task just committed a write; its reads
+    go to the primary for ReplicaRouter.sticky_for seconds afterwards.
+    transactional calls this after every commit that wrote something.
+    """
+    _last_commit.set(time.monotonic())
+
+
+class ReplicaRouter(object):
+    """
+    Sends reads to read replicas of a primary database, round-robin, and
+    everything else to the primary.
+
+    A replica is any path (or SQLite URI) holding a readable copy of the
+    primary: a copy refreshed by the application, or the primary file
+    itself in WAL mode, where extra read-only connections read alongside
+    the writer. Replicas are opened read-only. Keeping copies in sync is
+    up to the caller; after a commit the committing thread or task reads
+    from the primary for sticky_for seconds, so it sees its own writes.
+    """
+
+    def __init__(self, sticky_for=5.0):
+        self.sticky_for = sticky_for
+        self.routed = Counter()   # "primary" / "replica" -> connections
+        self._replicas = {}       # primary -> (replicas, round-robin counter)
+        self._lock = threading.Lock()
+
+    def configure(self, primary, replicas, sticky_for=None):
+        with self._lock:
+            if replicas:
+                self._replicas[primary] = (tuple(replicas), itertools.count())
+            else:
+                self._replicas.pop(primary, None)
+            if sticky_for is not None:
+                self.sticky_for = sticky_for
+
+    def route(self, database, read_only):
+        """
+        Returns (database, read_only) for the connection to open.
+        """
+        entry = self._replicas.get(database)
+        if (not read_only or entry is None
+                or time.monotonic() - _last_commit.get() < self.sticky_for):
+            self.routed["primary"] += 1
+            return database, False
+        replicas, counter = entry
+        self.routed["replica"] += 1
+        return replicas[next(counter) % len(replicas)], True
+
+
+router = ReplicaRouter()
+
+
+def configure_replicas(primary='users.db', replicas=(), sticky_for=None):
+    """
+    Registers read replicas for primary; with_db_connection routes
+    read-only calls to them. An empty list turns routing off again.
+    """
+    router.configure(primary, replicas, sticky_for)
+    return router
+
+
+def _is_read(func, read_only, args, kwargs):
+    """
+    read_only from the decorator wins; transactional functions write;
+    otherwise only a SELECT/WITH query passed in is a read, and every
+    other call goes to the primary.
+    """
+    if read_only is not None:
+        return read_only
+    if getattr(func, "writes", False):
+        return False
+    query = query_of(args, kwargs)
+    return query is not None and is_read(query)
+
+
+def with_db_connection(func=None, database='users.db', read_only=None):
+    """
+    Opens a connection for each call, passes it as the first argument and
+    closes it afterwards. Coroutine functions get an aiosqlite connection.
+
+    With replicas configured (configure_replicas), reads are served by a
+    replica: read_only=True/False forces the choice, otherwise it is taken
+    from the SQL verb of the query argument.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_db_connection_wrapper(*args, **kwargs):
+                target, ro = router.route(
+                    database, _is_read(func, read_only, args, kwargs))
+                conn = await connect_async(target, read_only=ro)
+                try:
+                    return await func(conn, *args, **kwargs)
+                finally:
+                    await conn.close()
+            return async_db_connection_wrapper
+
+        @functools.wraps(func)
+        def db_connection_wrapper(*args, **kwargs):
+            target, ro = router.route(
+                database, _is_read(func, read_only, args, kwargs))
+            conn = connect(target, read_only=ro)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return db_connection_wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
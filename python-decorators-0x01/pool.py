@@ -0,0 +1,435 @@
+import sqlite3
+import threading
+import time
+import asyncio
+import weakref
+import inspect
+import functools
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+import connection
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no connection could be checked out in time."""
+
+
+class PoolStats(object):
+    def __init__(self):
+        self.hits = 0           # checkouts served by an idle connection
+        self.creates = 0        # new connections opened
+        self.waits = 0          # checkouts that had to wait for a release
+        self.timeouts = 0       # checkouts that gave up waiting
+        self.evictions = 0      # idle connections closed for being stale
+        self.failed_checks = 0  # idle connections that failed the health check
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of sqlite3 connections.
+
+    Between min_size and max_size connections are kept; checkouts reuse an
+    idle connection when one is available (after a cheap health check),
+    open a new one while under max_size, and otherwise wait up to timeout
+    seconds for a release. Connections idle longer than max_idle seconds
+    are closed, down to min_size.
+    """
+
+    def __init__(self, database='users.db', min_size=1, max_size=5, timeout=5.0,
+                 max_idle=300.0, health_check=True, connect=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self._connect = connect or (
+            lambda: connection.connect(database, check_same_thread=False)
+        )
+        self.stats = PoolStats()
+        self._idle = deque()    # (connection, released_at), most recent last
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        for _ in range(min_size):
+            self._size += 1
+            self._idle.append((self._create(), time.monotonic()))
+
+    def _create(self):
+        """
+        Opens a connection for a slot already counted in _size, giving the
+        slot back if that fails.
+        """
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self.stats.creates += 1
+        return conn
+
+    def _discard(self, conn):
+        self._size -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.max_idle):
+            conn, _ = self._idle.popleft()
+            self._discard(conn)
+            self.stats.evictions += 1
+
+    def acquire(self, timeout=None):
+        """
+        Checks out a connection; pair with release() or use connection().
+        Opening and health-checking connections happen outside the lock
+        (a new slot is reserved first), so a slow connect does not stall
+        other checkouts and releases.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise sqlite3.ProgrammingError("Connection pool is closed")
+                    self._evict_idle()
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1   # reserve the slot for _create
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats.timeouts += 1
+                        raise PoolTimeout(f"No connection available after {timeout}s")
+                    if not waited:
+                        self.stats.waits += 1
+                        waited = True
+                    self._lock.wait(remaining)
+
+            if conn is None:
+                return self._create()
+            if not self.health_check or self._healthy(conn):
+                with self._lock:
+                    self.stats.hits += 1
+                return conn
+            with self._lock:
+                self.stats.failed_checks += 1
+                self._discard(conn)
+                self._lock.notify()
+
+    def release(self, conn):
+        """
+        Returns a connection to the pool, rolling back uncommitted work.
+        """
+        with self._lock:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                self._discard(conn)
+                self._lock.notify()
+                return
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """
+        Closes idle connections; busy ones are closed when released.
+        """
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+
+class AsyncConnectionPool(object):
+    """
+    asyncio counterpart of ConnectionPool over aiosqlite connections.
+    Checkouts never block the event loop; waiting for a free connection
+    is an await on a condition. Use one pool per event loop.
+    """
+
+    def __init__(self, database='users.db', max_size=5, timeout=5.0,
+                 health_check=True, connect=None):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self._connect = connect
+        self.stats = PoolStats()
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._lock = None
+
+    async def _create(self):
+        """
+        Opens a connection for a slot already counted in _size, giving the
+        slot back if that fails.
+        """
+        try:
+            if self._connect is not None:
+                conn = await self._connect()
+            else:
+                conn = await connection.connect_async(self.database)
+        except BaseException:
+            self._size -= 1
+            async with self._lock:
+                self._lock.notify()
+            raise
+        self.stats.creates += 1
+        return conn
+
+    async def _discard(self, conn):
+        self._size -= 1
+        try:
+            await conn.close()
+        except sqlite3.Error:
+            pass
+
+    async def _healthy(self, conn):
+        try:
+            async with conn.execute("SELECT 1") as cursor:
+                await cursor.fetchone()
+            return True
+        except (sqlite3.Error, ValueError):
+            return False
+
+    async def acquire(self, timeout=None):
+        """
+        Checks out a connection; pair with release() or use connection().
+        Connecting and health checks are awaited outside the lock (a new
+        slot is reserved first), so a slow connect does not hold up other
+        checkouts and releases on the loop.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self._lock is None:
+            self._lock = asyncio.Condition()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waited = False
+        while True:
+            async with self._lock:
+                while True:
+                    if self._closed:
+                        raise sqlite3.ProgrammingError("Connection pool is closed")
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1   # reserve the slot for _create
+                        conn = None
+                        break
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self.stats.timeouts += 1
+                        raise PoolTimeout(f"No connection available after {timeout}s")
+                    if not waited:
+                        self.stats.waits += 1
+                        waited = True
+                    try:
+                        await asyncio.wait_for(self._lock.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+            if conn is None:
+                return await self._create()
+            if not self.health_check or await self._healthy(conn):
+                self.stats.hits += 1
+                return conn
+            self.stats.failed_checks += 1
+            await self._discard(conn)
+            async with self._lock:
+                self._lock.notify()
+
+    async def release(self, conn):
+        """
+        Returns a connection to the pool, rolling back uncommitted work.
+        """
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except (sqlite3.Error, ValueError):
+            await self._discard(conn)
+        else:
+            if self._closed:
+                await self._discard(conn)
+            else:
+                self._idle.append(conn)
+        async with self._lock:
+            self._lock.notify()
+
+    @asynccontextmanager
+    async def connection(self, timeout=None):
+        conn = await self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+
+_default_pool = None
+_async_pools = weakref.WeakKeyDictionary()   # event loop -> AsyncConnectionPool
+_default_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide pool used by with_pooled_connection.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+async def _close_with_loop(pool):
+    """
+    Parked at its yield for the life of the loop: asyncio.run() finalizes
+    async generators before closing the loop, which closes the pool, so
+    its aiosqlite threads do not keep the interpreter from exiting.
+    """
+    try:
+        yield
+    finally:
+        await pool.close()
+
+
+async def _park(agen):
+    await agen.asend(None)
+
+
+def get_async_pool():
+    """
+    Returns the running loop's async pool used by with_pooled_connection
+    on coroutine functions. It is closed when asyncio.run() ends the loop,
+    or earlier by close_async_pool().
+    """
+    loop = asyncio.get_running_loop()
+    with _default_pool_lock:
+        pool = _async_pools.get(loop)
+        if pool is None:
+            pool = _async_pools[loop] = AsyncConnectionPool()
+            # the loop only holds async generators weakly
+            pool.closer = _close_with_loop(pool)
+            loop.create_task(_park(pool.closer))
+        return pool
+
+
+async def close_async_pool():
+    """
+    Closes the running loop's shared async pool, for loops not run by
+    asyncio.run(); the next get_async_pool() starts a new one.
+    """
+    with _default_pool_lock:
+        pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+
+def configure_pool(**options):
+    """
+    Replaces the process-wide pool, e.g. configure_pool(max_size=10).
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.close()
+        _default_pool = ConnectionPool(**options)
+        return _default_pool
+
+
+def with_pooled_connection(func=None, pool=None):
+    """
+    Pooled drop-in for with_db_connection: the decorated function still
+    receives a connection as its first argument, but it is borrowed from
+    a pool instead of opened and closed on every call.
+
+        @with_pooled_connection
+        def get_user_by_id(conn, user_id): ...
+
+        @with_pooled_connection(pool=ConnectionPool(max_size=10))
+        def get_user_by_id(conn, user_id): ...
+
+    Coroutine functions borrow aiosqlite connections from an
+    AsyncConnectionPool instead.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_pooled_connection_wrapper(*args, **kwargs):
+                async with (pool or get_async_pool()).connection() as conn:
+                    return await func(conn, *args, **kwargs)
+            return async_pooled_connection_wrapper
+
+        @functools.wraps(func)
+        def pooled_connection_wrapper(*args, **kwargs):
+            with (pool or get_pool()).connection() as conn:
+                return func(conn, *args, **kwargs)
+        return pooled_connection_wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
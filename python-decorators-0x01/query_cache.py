@@ -0,0 +1,255 @@
+import re
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_TABLES = re.compile(
+    r"""\b(?:from|join|into|update|table(?:\s+if\s+(?:not\s+)?exists)?)\s+([\w."]+)""",
+    re.IGNORECASE,
+)
+_WRITE_VERBS = ("insert", "update", "delete", "replace", "create", "drop", "alter")
+_READ_VERBS = ("select", "with")
+
+
+def normalize_sql(sql):
+    """
+    Canonical form of a statement for cache keys: whitespace collapsed,
+    unquoted text lower-cased, trailing semicolon dropped. Quoted strings
+    and identifiers are left untouched.
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(";"))
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i]).lower()
+    return "".join(parts).strip()
+
+
+def tables_in(sql):
+    """
+    Names of the tables a statement reads from or writes to.
+    """
+    return frozenset(
+        name.strip('"').split(".")[-1].lower() for name in _TABLES.findall(sql)
+    )
+
+
+def _verb(sql):
+    return normalize_sql(sql).split(" ", 1)[0]
+
+
+def is_write(sql):
+    return _verb(sql) in _WRITE_VERBS
+
+
+def is_read(sql):
+    return _verb(sql) in _READ_VERBS
+
+
+def is_sql(value):
+    return isinstance(value, str) and (is_read(value) or is_write(value))
+
+
+def query_of(args, kwargs):
+    """
+    The SQL passed to a decorated function: the `query` kwarg, or else
+    the first positional string that starts with a SQL verb. Other
+    strings (names, emails) are plain arguments.
+    """
+    if 'query' in kwargs:
+        return kwargs['query']
+    for arg in args:
+        if is_sql(arg):
+            return arg
+    return None
+
+
+class CacheStats(object):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0       # dropped to stay under max_entries
+        self.expirations = 0     # dropped because their TTL ran out
+        self.invalidations = 0   # dropped because a table they read changed
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class QueryCache(object):
+    """
+    Thread-safe LRU cache of query results with optional per-entry TTL
+    and table-level invalidation.
+    """
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()   # key -> (value, expires_at, tables)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (True, value) on a hit and (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, value
+
+    def peek(self, key):
+        """
+        Like get(), but leaves the stats and the LRU order alone; for
+        re-checking a key whose miss was already counted.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                return False, None
+            return True, value
+
+    def set(self, key, value, tables=(), ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at, frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate_tables(self, tables):
+        """
+        Drops every entry that read from any of the given tables.
+        """
+        tables = {table.lower() for table in tables}
+        if not tables:
+            return 0
+        with self._lock:
+            stale = [key for key, (_, _, read) in self._entries.items()
+                     if read & tables]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+query_cache = QueryCache()
+
+
+def _freeze(value):
+    """
+    Hashable version of bound parameters (lists, dicts) for cache keys.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def cache_query(func=None, cache=None, ttl=None):
+    """
+    Caches the results of a `func(conn, query, ...)` style function.
+
+    The key is the function, the normalized SQL and every other argument
+    (bound parameters included); the connection is ignored. Entries are
+    evicted LRU-first, expire after ttl seconds if set, and are dropped
+    when a write through transactional touches a table they read.
+    Concurrent misses for the same key (threads or coroutines) wait for a
+    single execution and share its result; see singleflight.py.
+
+        @cache_query
+        def fetch_users_with_cache(conn, query): ...
+
+        @cache_query(ttl=30)
+        def fetch_user(conn, query, params=()): ...
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        store = query_cache if cache is None else cache
+
+        signature = inspect.signature(func)
+        params = list(signature.parameters)[1:]   # all but the connection
+        query_param = 'query' if 'query' in params else params[0]
+
+        def key_of(conn, args, kwargs):
+            # bound by name with defaults filled in, so f(conn, q, (2,)) and
+            # f(conn, query=q, params=(2,)) share one entry
+            bound = signature.bind(conn, *args, **kwargs)
+            bound.apply_defaults()
+            query = bound.arguments[query_param]
+            rest = [(param, bound.arguments[param]) for param in params
+                    if param != query_param]
+            return query, (name, normalize_sql(query), _freeze(rest))
+
+        if inspect.iscoroutinefunction(func):
+            flight = AsyncSingleFlight()
+
+            @functools.wraps(func)
+            async def async_cache_wrapper(conn, *args, **kwargs):
+                query, key = key_of(conn, args, kwargs)
+                hit, result = store.get(key)
+                if hit:
+                    return result
+
+                async def load():
+                    hit, result = store.peek(key)  # filled while we got here
+                    if hit:
+                        return result
+                    result = await func(conn, *args, **kwargs)
+                    store.set(key, result, tables_in(query), ttl)
+                    return result
+                return await flight.do(key, load)
+            async_cache_wrapper.cache = store
+            async_cache_wrapper.flight = flight
+            return async_cache_wrapper
+
+        flight = SingleFlight()
+
+        @functools.wraps(func)
+        def cache_wrapper(conn, *args, **kwargs):
+            query, key = key_of(conn, args, kwargs)
+            hit, result = store.get(key)
+            if hit:
+                return result
+
+            def load():
+                hit, result = store.peek(key)  # filled while we got here
+                if hit:
+                    return result
+                result = func(conn, *args, **kwargs)
+                store.set(key, result, tables_in(query), ttl)
+                return result
+            return flight.do(key, load)
+        cache_wrapper.cache = store
+        cache_wrapper.flight = flight
+        return cache_wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,137 @@
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import inspect
+import logging
+import functools
+import threading
+import logging.handlers
+
+from query_cache import is_sql, normalize_sql, query_of
+
+logger = logging.getLogger("queries")
+
+
+class QueryLogConfig(object):
+    def __init__(self, sample_rate=1.0, slow_ms=100.0):
+        self.sample_rate = sample_rate
+        self.slow_ns = int(slow_ms * 1_000_000)
+
+
+config = QueryLogConfig()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def configure_query_log(sample_rate=1.0, slow_ms=100.0, handler=None):
+    """
+    Sets the sample rate (fraction of queries logged) and the slow-query
+    threshold; slow and failing queries are always logged, at WARNING.
+    Records go through a QueueHandler to a listener thread that owns the
+    real handler (stderr by default), so the querying thread never waits
+    on I/O.
+    """
+    global _listener
+    config.sample_rate = sample_rate
+    config.slow_ns = int(slow_ms * 1_000_000)
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+        for old in list(logger.handlers):
+            logger.removeHandler(old)
+        records = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(
+            records, handler or logging.StreamHandler(), respect_handler_level=True
+        )
+        _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def _param_count(args, kwargs):
+    params = kwargs.get('params')
+    if params is None:
+        for i, arg in enumerate(args):
+            if is_sql(arg):
+                params = args[i + 1] if i + 1 < len(args) else ()
+                break
+    if isinstance(params, (list, tuple, dict)):
+        return len(params)
+    return 0 if params is None else 1
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def _emit(func, args, kwargs, result, duration_ns, caller, error=None):
+    slow = duration_ns >= config.slow_ns
+    if not slow and error is None and random.random() >= config.sample_rate:
+        return
+    if _listener is None:
+        configure_query_log(config.sample_rate, config.slow_ns / 1_000_000)
+    query = query_of(args, kwargs)
+    record = {
+        "function": func.__qualname__,
+        "sql": normalize_sql(query) if query else None,
+        "params": _param_count(args, kwargs),
+        "duration_ms": duration_ns / 1_000_000,
+        "rows": None if error else _row_count(result),
+        "caller": f"{caller.f_code.co_filename}:{caller.f_lineno} in {caller.f_code.co_name}",
+        "slow": slow,
+    }
+    if error is not None:
+        record["error"] = repr(error)
+    level = logging.WARNING if slow or error is not None else logging.INFO
+    logger.log(level, json.dumps(record), extra={"query": record})
+
+
+def log_queries(func):
+    """
+    Structured, sampled query log. Each logged call records the
+    normalized SQL, parameter count, duration (perf_counter_ns), rows
+    returned and the calling line; see configure_query_log. Works on
+    plain and coroutine functions.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            caller = sys._getframe(1)
+            start = time.perf_counter_ns()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                _emit(func, args, kwargs, None, time.perf_counter_ns() - start, caller, e)
+                raise
+            _emit(func, args, kwargs, result, time.perf_counter_ns() - start, caller)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        caller = sys._getframe(1)
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            _emit(func, args, kwargs, None, time.perf_counter_ns() - start, caller, e)
+            raise
+        _emit(func, args, kwargs, result, time.perf_counter_ns() - start, caller)
+        return result
+    return wrapper
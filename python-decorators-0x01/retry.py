@@ -0,0 +1,262 @@
+import time
+import random
+import sqlite3
+import asyncio
+import inspect
+import functools
+import threading
+from collections import Counter, deque
+
+
+class RetryError(Exception):
+    """
+    Raised when a call keeps failing; the last error is its __cause__.
+    """
+
+    def __init__(self, message, attempts):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+def constant(delay=1.0):
+    """Always waits delay seconds."""
+    def next_delay(attempt, previous):
+        return delay
+    return next_delay
+
+
+def exponential(base=0.1, factor=2.0, max_delay=10.0, jitter=True):
+    """
+    base * factor**(attempt - 1), capped at max_delay. With jitter the
+    wait is drawn uniformly from [0, that] ("full jitter"), so clients
+    failing together do not retry together.
+    """
+    def next_delay(attempt, previous):
+        ceiling = min(max_delay, base * factor ** (attempt - 1))
+        return random.uniform(0, ceiling) if jitter else ceiling
+    return next_delay
+
+
+def decorrelated_jitter(base=0.1, max_delay=10.0):
+    """
+    Each wait is drawn from [base, 3 * previous wait], capped at max_delay.
+    """
+    def next_delay(attempt, previous):
+        return min(max_delay, random.uniform(base, max(base, previous * 3)))
+    return next_delay
+
+
+def is_transient(error):
+    """
+    Default retry classification: only SQLite lock/busy errors, which go
+    away once the other writer finishes. Anything else (bad SQL, missing
+    table, constraint violations) fails on the first attempt.
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class RetryBudget(object):
+    """
+    Process-wide limit on retries, shared by every decorated function.
+
+    Over a sliding window, retries may not exceed `ratio` of first
+    attempts (plus min_retries so quiet processes can still retry).
+    Independently, once at least min_calls calls in the window have
+    failed at a rate above failure_threshold the breaker opens and no
+    retries are made for `cooldown` seconds. Either way the failing
+    call is raised straight away instead of adding load.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, window=10.0,
+                 failure_threshold=0.5, min_calls=20, cooldown=5.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._calls = deque()     # (timestamp, succeeded)
+        self._retries = deque()   # timestamps
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        horizon = now - self.window
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+        while self._retries and self._retries[0] < horizon:
+            self._retries.popleft()
+
+    def record(self, succeeded):
+        """Records the outcome of a whole call (after its retries)."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._calls.append((now, succeeded))
+            if len(self._calls) >= self.min_calls:
+                failures = sum(1 for _, ok in self._calls if not ok)
+                if failures / len(self._calls) > self.failure_threshold:
+                    self._open_until = now + self.cooldown
+
+    def try_retry(self):
+        """Takes one retry from the budget; False when none is left."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._open_until:
+                return False
+            self._trim(now)
+            allowed = self.min_retries + self.ratio * len(self._calls)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+    @property
+    def is_open(self):
+        return time.monotonic() < self._open_until
+
+
+default_budget = RetryBudget()
+
+
+class RetryStats(object):
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.budget_denied = 0               # retries skipped by the budget
+        self.attempts_per_call = Counter()   # attempts -> number of calls
+        self._lock = threading.Lock()
+
+    def record(self, attempts, succeeded, denied):
+        with self._lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            self.attempts_per_call[attempts] += 1
+            if succeeded:
+                self.successes += 1
+            else:
+                self.failures += 1
+            if denied:
+                self.budget_denied += 1
+
+    @property
+    def mean_attempts(self):
+        return (self.calls + self.retries) / self.calls if self.calls else 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "budget_denied": self.budget_denied,
+            "mean_attempts": self.mean_attempts,
+            "attempts_per_call": dict(self.attempts_per_call),
+        }
+
+
+class _Attempts(object):
+    """
+    Retry bookkeeping for a single call, shared by the sync and async
+    wrappers. next_delay() returns how long to wait before the next
+    attempt, or raises when the call should give up.
+    """
+
+    def __init__(self, retries, backoff, retryable, budget, stats):
+        self.retries = retries
+        self.backoff = backoff
+        self.retryable = retryable
+        self.budget = budget
+        self.stats = stats
+        self.attempt = 0
+        self.delay = 0.0
+
+    def start(self):
+        self.attempt += 1
+
+    def succeeded(self):
+        self.stats.record(self.attempt, True, False)
+        if self.budget:
+            self.budget.record(True)
+
+    def next_delay(self, error):
+        denied = False
+        if not self.retryable(error):
+            give_up = "not retryable"
+        elif self.attempt >= self.retries:
+            give_up = "max retries exceeded"
+        elif self.budget and not self.budget.try_retry():
+            give_up, denied = "retry budget exhausted", True
+        else:
+            print(f"Error occurred: {error}")
+            self.delay = self.backoff(self.attempt, self.delay)
+            return self.delay
+
+        self.stats.record(self.attempt, False, denied)
+        if self.budget:
+            self.budget.record(False)
+        if give_up == "not retryable":
+            raise error
+        raise RetryError(
+            f"{give_up.capitalize()} after {self.attempt} attempt(s)",
+            self.attempt,
+        ) from error
+
+
+def retry_on_failure(retries=3, delay=1, backoff=None, retryable=is_transient,
+                     budget=None):
+    """
+    Retries a failing function up to `retries` attempts in total.
+
+    backoff picks the wait before each retry (default: exponential with
+    full jitter starting at `delay` seconds; see constant, exponential
+    and decorrelated_jitter). Only errors for which retryable(error) is
+    true are retried, others propagate unchanged. Retries are drawn from
+    a RetryBudget (the process-wide default_budget unless one is given,
+    budget=False disables it). When retries run out RetryError is raised
+    from the last error. Per-function metrics are on wrapper.retry_stats.
+    Coroutine functions wait with asyncio.sleep.
+    """
+    backoff = backoff or exponential(base=delay)
+    budget = default_budget if budget is None else budget
+    retryable = retryable or (lambda error: True)
+
+    def decorator(func):
+        stats = RetryStats()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = _Attempts(retries, backoff, retryable, budget, stats)
+                while True:
+                    attempts.start()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        await asyncio.sleep(attempts.next_delay(e))
+                        continue
+                    attempts.succeeded()
+                    return result
+            async_wrapper.retry_stats = stats
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attempts = _Attempts(retries, backoff, retryable, budget, stats)
+            while True:
+                attempts.start()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    time.sleep(attempts.next_delay(e))
+                    continue
+                attempts.succeeded()
+                return result
+        wrapper.retry_stats = stats
+        return wrapper
+    return decorator
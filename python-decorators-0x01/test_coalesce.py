@@ -0,0 +1,121 @@
+import os
+import time
+import sqlite3
+import tempfile
+import unittest
+
+from coalesce import WriteCoalescer
+from query_cache import QueryCache
+
+
+def set_email(conn, user_id, email):
+    return (email, user_id)
+
+
+def make_database(test, rows=1):
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    database = os.path.join(directory.name, "users.db")
+    conn = sqlite3.connect(database)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE)")
+    conn.executemany("INSERT INTO users VALUES (?, ?)",
+                     [(i, f"old{i}@example.com") for i in range(1, rows + 1)])
+    conn.commit()
+    conn.close()
+    return database
+
+
+def emails(database):
+    conn = sqlite3.connect(database)
+    try:
+        return dict(conn.execute("SELECT id, email FROM users"))
+    finally:
+        conn.close()
+
+
+class TestWriteCoalescer(unittest.TestCase):
+    """Calls are batched into shared transactions."""
+
+    def test_idle_writer_flushes_after_max_delay(self):
+        database = make_database(self)
+        coalescer = WriteCoalescer(set_email, sql="UPDATE users SET email = ? WHERE id = ?",
+                                   max_delay=0.01, database=database, cache=QueryCache())
+        self.addCleanup(coalescer.close)
+        time.sleep(0.2)   # let the writer go idle
+        start = time.monotonic()
+        coalescer.submit(1, "new@example.com").result(timeout=2)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(emails(database)[1], "new@example.com")
+
+    def test_executemany_batch(self):
+        database = make_database(self, rows=3)
+        coalescer = WriteCoalescer(set_email, sql="UPDATE users SET email = ? WHERE id = ?",
+                                   max_batch=3, max_delay=10, database=database,
+                                   cache=QueryCache())
+        self.addCleanup(coalescer.close)
+        futures = [coalescer.submit(i, f"new{i}@example.com") for i in (1, 2, 3)]
+        for future in futures:
+            self.assertIsNone(future.result(timeout=2))
+        self.assertEqual(coalescer.batches, 1)
+        self.assertEqual(coalescer.calls, 3)
+        self.assertEqual(emails(database), {i: f"new{i}@example.com" for i in (1, 2, 3)})
+
+    def test_failing_call_rolls_back_alone(self):
+        database = make_database(self, rows=3)
+
+        def update_email(conn, user_id, email):
+            conn.execute("UPDATE users SET email = ? WHERE id = ?", (email, user_id))
+            return user_id
+
+        coalescer = WriteCoalescer(update_email, max_batch=3, max_delay=10,
+                                   database=database, cache=QueryCache())
+        self.addCleanup(coalescer.close)
+        first = coalescer.submit(1, "new1@example.com")
+        duplicate = coalescer.submit(2, "old3@example.com")   # violates UNIQUE
+        third = coalescer.submit(3, "new3@example.com")
+        self.assertEqual(first.result(timeout=2), 1)
+        with self.assertRaises(sqlite3.IntegrityError):
+            duplicate.result(timeout=2)
+        self.assertEqual(third.result(timeout=2), 3)
+        self.assertEqual(coalescer.batches, 1)
+        self.assertEqual(emails(database), {1: "new1@example.com", 2: "old2@example.com",
+                                            3: "new3@example.com"})
+
+
+class TestWriteCoalescerFailure(unittest.TestCase):
+    """A writer thread that cannot run must fail calls, not strand them."""
+
+    def test_connect_failure_fails_pending_and_later_calls(self):
+        coalescer = WriteCoalescer(set_email, sql="UPDATE users SET email = ? WHERE id = ?",
+                                   database="/nonexistent/dir/x.db", cache=QueryCache())
+        coalescer._thread.join(timeout=2)
+        self.assertFalse(coalescer._thread.is_alive())
+
+        future = coalescer.submit(1, "a@example.com")
+        with self.assertRaises(sqlite3.OperationalError):
+            future.result(timeout=2)
+        coalescer.flush()   # returns instead of waiting forever
+        coalescer.close()
+
+    def test_writer_error_fails_later_calls(self):
+        database = make_database(self)
+
+        class BrokenCache(QueryCache):
+            def invalidate_tables(self, tables):
+                raise RuntimeError("cache is broken")
+
+        coalescer = WriteCoalescer(set_email, sql="UPDATE users SET email = ? WHERE id = ?",
+                                   max_delay=0.01, database=database, cache=BrokenCache())
+        first = coalescer.submit(1, "new@example.com")
+        first.result(timeout=2)   # written before the cache blew up
+        coalescer._thread.join(timeout=2)
+        self.assertFalse(coalescer._thread.is_alive())
+
+        later = coalescer.submit(1, "newer@example.com")
+        with self.assertRaisesRegex(RuntimeError, "cache is broken"):
+            later.result(timeout=2)
+        coalescer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
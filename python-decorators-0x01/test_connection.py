@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from connection import configure_replicas, router, with_db_connection
+
+
+class TestReplicaRouting(unittest.TestCase):
+    """Only calls carrying a SELECT/WITH query may go to a replica."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.primary = os.path.join(directory.name, "users.db")
+        self.replica = os.path.join(directory.name, "replica.db")
+        for database in (self.primary, self.replica):
+            conn = sqlite3.connect(database)
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+            conn.execute("INSERT INTO users VALUES (1, 'old@example.com')")
+            conn.commit()
+            conn.close()
+        configure_replicas(self.primary, [self.replica], sticky_for=0)
+        self.addCleanup(configure_replicas, self.primary, [])
+        router.routed.clear()
+
+    def test_string_argument_is_not_sql(self):
+        @with_db_connection(database=self.primary)
+        def set_email(conn, user_id, email):
+            conn.execute("UPDATE users SET email = ? WHERE id = ?", (email, user_id))
+            conn.commit()
+
+        set_email(1, "new@example.com")
+        self.assertEqual(router.routed, {"primary": 1})
+
+    def test_select_goes_to_replica(self):
+        @with_db_connection(database=self.primary)
+        def fetch(conn, query, params=()):
+            return conn.execute(query, params).fetchall()
+
+        fetch("SELECT email FROM users")
+        fetch(query="WITH u AS (SELECT email FROM users) SELECT * FROM u")
+        fetch("UPDATE users SET email = 'x' WHERE id = 1")
+        self.assertEqual(router.routed, {"replica": 2, "primary": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+
+import aiosqlite
+
+from pool import AsyncConnectionPool
+
+
+class TestAsyncConnectionPool(unittest.IsolatedAsyncioTestCase):
+    """A slow connect must not hold up other checkouts and releases."""
+
+    async def test_slow_connect_does_not_block_release(self):
+        slow = asyncio.Event()
+
+        async def connect():
+            if slow.is_set():
+                await asyncio.sleep(0.5)
+            return await aiosqlite.connect(":memory:")
+
+        pool = AsyncConnectionPool(max_size=2, connect=connect)
+        first = await pool.acquire()
+        slow.set()
+        opening = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0.05)   # the second checkout is now connecting
+
+        await asyncio.wait_for(pool.release(first), 0.2)
+        again = await asyncio.wait_for(pool.acquire(), 0.2)
+        self.assertIs(again, first)
+        await pool.release(again)
+
+        await pool.release(await opening)
+        self.assertEqual((pool.size, pool.idle), (2, 2))
+        await pool.close()
+
+    async def test_failed_connect_gives_the_slot_back(self):
+        async def connect():
+            raise OSError("cannot connect")
+
+        pool = AsyncConnectionPool(max_size=1, connect=connect, timeout=0.1)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                await pool.acquire()
+        self.assertEqual(pool.size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
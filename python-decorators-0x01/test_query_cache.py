@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+
+from query_cache import QueryCache, cache_query
+
+
+class TestCacheQuery(unittest.TestCase):
+    """The hit/miss counters see each lookup once."""
+
+    def test_miss_counted_once(self):
+        cache = QueryCache()
+
+        @cache_query(cache=cache)
+        def fetch(conn, query, params=()):
+            return [query, params]
+
+        @cache_query(cache=cache)
+        async def fetch_async(conn, query):
+            return [query]
+
+        fetch(None, "SELECT 1")
+        fetch(None, "SELECT 1")
+        asyncio.run(fetch_async(None, "SELECT 2"))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 2))
+
+    def test_key_ignores_how_arguments_are_passed(self):
+        cache = QueryCache()
+
+        @cache_query(cache=cache)
+        def fetch(conn, query, params=()):
+            return [query, params]
+
+        fetch(None, "SELECT * FROM users WHERE id = ?", (2,))
+        fetch(None, query="SELECT * FROM users WHERE id = ?", params=(2,))
+        fetch(None, "SELECT * FROM users")
+        fetch(None, "SELECT * FROM users", ())
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import asyncio
+import unittest
+
+from singleflight import AsyncSingleFlight
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Cancelling one caller must not cancel the shared execution."""
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.1)
+            return 42
+
+        leader = asyncio.ensure_future(asyncio.wait_for(flight.do("key", work), 0.02))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", work))
+        with self.assertRaises(asyncio.TimeoutError):
+            await leader
+        self.assertEqual(await follower, 42)
+        self.assertEqual((flight.executions, flight.shared), (1, 1))
+        self.assertEqual(flight._calls, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
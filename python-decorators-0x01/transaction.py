@@ -0,0 +1,86 @@
+import inspect
+import functools
+from datetime import datetime
+
+from connection import mark_committed
+from query_cache import is_write, query_cache, tables_in
+
+
+def transactional(func=None, cache=None):
+    """
+    Runs func(conn, ...) in a transaction: commit on success, rollback on
+    error. Statements executed meanwhile are traced, and on commit cached
+    query results that read from any table written to are invalidated,
+    and the caller's reads stick to the primary for a while (see
+    connection.ReplicaRouter).
+    Coroutine functions are expected to receive an aiosqlite connection.
+    """
+    def decorator(func):
+        store = query_cache if cache is None else cache
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_transactional_wrapper(*args, **kwargs):
+                conn = args[0]
+                current_time = datetime.now()
+                if not conn:
+                    return None
+
+                written = set()
+
+                def trace(statement):
+                    if is_write(statement):
+                        written.update(tables_in(statement))
+
+                await conn.set_trace_callback(trace)
+                try:
+                    result = await func(*args, **kwargs)
+                    print(f"{current_time.strftime('%H:%M:%S')}: Commiting transaction!")
+                    await conn.commit()
+                except Exception as e:
+                    print(f"{current_time.strftime('%H:%M:%S')}: Error occurred, rolling back!")
+                    await conn.rollback()
+                    raise e
+                finally:
+                    await conn.set_trace_callback(None)
+                if written:
+                    mark_committed()
+                store.invalidate_tables(written)
+                return result
+            async_transactional_wrapper.writes = True
+            return async_transactional_wrapper
+
+        @functools.wraps(func)
+        def transactional_wrapper(*args, **kwargs):
+            conn = args[0]
+            current_time = datetime.now()
+            if not conn:
+                return None
+
+            written = set()
+
+            def trace(statement):
+                if is_write(statement):
+                    written.update(tables_in(statement))
+
+            conn.set_trace_callback(trace)
+            try:
+                result = func(*args, **kwargs)
+                print(f"{current_time.strftime('%H:%M:%S')}: Commiting transaction!")
+                conn.commit()
+            except Exception as e:
+                print(f"{current_time.strftime('%H:%M:%S')}: Error occurred, rolling back!")
+                conn.rollback()
+                raise e
+            finally:
+                conn.set_trace_callback(None)
+            if written:
+                mark_committed()
+            store.invalidate_tables(written)
+            return result
+        transactional_wrapper.writes = True
+        return transactional_wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
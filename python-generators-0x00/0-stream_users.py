@@ -1,17 +1,16 @@
-import mysql.connector
+from backends import get_backend
+from query import Query
 
-def stream_users():
+def stream_users(backend=None):
     """
     Generator that yields rows from user_data table one by one as dictionaries.
+    Runs against the default backend (MySQL) unless another is given,
+    e.g. stream_users("sqlite") for the repo's users.db.
     """
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="your_mysql_user",
-        password="your_mysql_password",
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data;")
+    backend = get_backend(backend)
+    connection = backend.connect()
+    cursor = backend.dict_cursor(connection, stream=True)
+    cursor.execute(*Query(backend=backend).compile())
 
     for row in cursor:
         yield row
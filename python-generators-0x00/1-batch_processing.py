@@ -1,34 +1,103 @@
-import seed
+from backends import get_backend
+from columnar import nullable_columns, to_columns
+from pagination import decode_cursor, fetch_page_after
+from partition import partitioned_scan
+from query import Query
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, keyset=False, cursor=None, stream=False,
+                            columns=None, filters=None, backend=None,
+                            columnar=False, use_numpy=None):
     """
     Generator that yields batches of users from the database.
+
+    With keyset=True (or a resume cursor token) each batch seeks past
+    the last user_id seen instead of re-scanning OFFSET rows.
+
+    With stream=True the whole scan is a single query on an unbuffered
+    (server-side) cursor and batches are pulled with fetchmany, so only
+    batch_size rows are ever held in memory.
+
+    columns and filters (e.g. [("age", ">", 25)]) are compiled into the
+    SELECT list and WHERE clause, so only needed data leaves the database.
+
+    With columnar=True each batch is a {column: values} dict of typed
+    arrays (see columnar.to_columns) built straight from row tuples,
+    ready for vectorized filters and aggregates.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    offset = 0
+    backend = get_backend(backend)
+    query = Query.build(columns, filters, backend)
+    connection = backend.connect()
+    if columnar:
+        db_cursor = backend.cursor(connection, stream=stream)
+    else:
+        db_cursor = backend.dict_cursor(connection, stream=stream)
+
+    def emit(rows):
+        if not columnar:
+            return rows
+        names = [column[0] for column in db_cursor.description]
+        return to_columns(names, rows, use_numpy,
+                          nullable_columns(db_cursor.description))
 
-    while True:
-        cursor.execute(f"SELECT * FROM user_data LIMIT {batch_size} OFFSET {offset}")
-        rows = cursor.fetchall()
-        if not rows:
-            break
-        yield rows
-        offset += batch_size
+    def last_key(rows):
+        if not columnar:
+            return rows[-1][backend.key]
+        names = [column[0] for column in db_cursor.description]
+        return rows[-1][names.index(backend.key)]
 
-    cursor.close()
-    connection.close()
+    try:
+        if stream:
+            last_user_id = decode_cursor(cursor)
+            query = query.order(backend.key)
+            if last_user_id is not None:
+                query = query.where(backend.key, ">", last_user_id)
+            db_cursor.execute(*query.compile())
+            while True:
+                rows = db_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield emit(rows)
+        elif keyset or cursor is not None:
+            last_user_id = decode_cursor(cursor)
+            while True:
+                rows = fetch_page_after(db_cursor, batch_size, last_user_id, query)
+                if not rows:
+                    break
+                yield emit(rows)
+                if len(rows) < batch_size:
+                    break
+                last_user_id = last_key(rows)
+        else:
+            offset = 0
+            while True:
+                db_cursor.execute(*query.limit(batch_size, offset).compile())
+                rows = db_cursor.fetchall()
+                if not rows:
+                    break
+                yield emit(rows)
+                offset += batch_size
+    finally:
+        backend.close(connection, db_cursor)
 
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, partitions=1, backend=None):
     """
     Processes user batches and prints users over the age of 25.
     Returns number of users processed (added to satisfy checker).
+    With partitions > 1 the table is scanned concurrently by key range.
+    The age filter runs in the database, not in Python.
     """
+    filters = [("age", ">", 25)]
+    if partitions > 1:
+        batches = partitioned_scan(partitions, batch_size, filters=filters,
+                                   backend=backend)
+    else:
+        batches = stream_users_in_batches(batch_size, stream=True, filters=filters,
+                                          backend=backend)
+
     count = 0
-    for batch in stream_users_in_batches(batch_size):
+    for batch in batches:
         for user in batch:
-            if user['age'] > 25:
-                print(user)
-                count += 1
+            print(user)
+            count += 1
     return count
@@ -1,26 +1,83 @@
-import seed  # assumes seed.connect_to_prodev() works
+from backends import get_backend
+from pagination import decode_cursor, fetch_page_after
+from prefetch import prefetch as read_ahead
+from query import Query
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset, connection=None, backend=None):
     """
     Helper to fetch users using LIMIT and OFFSET.
+    Reuses the given connection, otherwise opens a short-lived one.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    backend = get_backend(backend)
+    owns_connection = connection is None
+    if owns_connection:
+        connection = backend.connect()
+    cursor = backend.dict_cursor(connection)
+    cursor.execute(*Query(backend=backend).limit(page_size, offset).compile())
     rows = cursor.fetchall()
     cursor.close()
-    connection.close()
+    if owns_connection:
+        connection.close()
     return rows
 
-def lazy_pagination(page_size):
+def paginate_users_after(page_size, last_user_id=None, connection=None,
+                         backend=None):
+    """
+    Helper to fetch the page of users that follows last_user_id.
+    Reuses the given connection, otherwise opens a short-lived one.
+    """
+    backend = get_backend(backend)
+    owns_connection = connection is None
+    if owns_connection:
+        connection = backend.connect()
+    cursor = backend.dict_cursor(connection)
+    rows = fetch_page_after(cursor, page_size, last_user_id, backend=backend)
+    cursor.close()
+    if owns_connection:
+        connection.close()
+    return rows
+
+def _paginate(page_size, keyset, cursor, backend):
+    """
+    Yields pages over a single connection; see lazy_pagination.
+    """
+    backend = get_backend(backend)
+    connection = backend.connect()
+    try:
+        if keyset or cursor is not None:
+            last_user_id = decode_cursor(cursor)
+            while True:
+                page = paginate_users_after(page_size, last_user_id,
+                                            connection, backend)
+                if not page:
+                    break
+                yield page
+                if len(page) < page_size:
+                    break
+                last_user_id = page[-1][backend.key]
+            return
+
+        offset = 0
+        while True:
+            page = paginate_users(page_size, offset, connection, backend)
+            if not page:
+                break
+            yield page
+            offset += page_size
+    finally:
+        connection.close()
+
+def lazy_pagination(page_size, keyset=False, cursor=None, backend=None,
+                    prefetch=0):
     """
     Generator to lazily paginate user_data table.
-    Yields one page of results at a time.
-    """
-    offset = 0
-    while True:
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
+    Yields one page of results at a time, reusing a single connection.
+
+    With keyset=True (or a cursor token from pagination.next_cursor)
+    pages are fetched with `WHERE user_id > last_seen` so latency stays
+    flat however deep the scan goes.
+
+    With prefetch=N a background thread fetches up to N pages ahead of
+    the consumer, so page round-trips overlap with page processing.
+    """
+    return read_ahead(_paginate(page_size, keyset, cursor, backend), prefetch)
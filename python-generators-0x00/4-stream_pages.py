@@ -1,12 +1,15 @@
-import seed
+from aggregate import aggregate, aggregate_stream
+from backends import get_backend
+from query import Query
 
-def stream_user_ages():
+def stream_user_ages(backend=None):
     """
     Generator that yields user ages one at a time from the database.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor()
-    cursor.execute("SELECT age FROM user_data")
+    backend = get_backend(backend)
+    connection = backend.connect()
+    cursor = backend.cursor(connection, stream=True)
+    cursor.execute(*Query(backend=backend).select("age").compile())
 
     for (age,) in cursor:
         yield age
@@ -15,22 +18,22 @@ def stream_user_ages():
     connection.close()
 
 
-def compute_average_age():
+def compute_average_age(pushdown=True, backend=None):
     """
-    Computes the average age using the age generator.
+    Computes the average age of users.
+    By default AVG is pushed down to the database so a single row is
+    transferred; pushdown=False streams every age through the generator.
     """
-    total_age = 0
-    count = 0
-
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
+    if pushdown:
+        average = aggregate(("avg",), backend=backend)["avg"]
+    else:
+        average = aggregate_stream(stream_user_ages(backend), ("avg",))["avg"]
 
-    if count == 0:
+    if average is None:
         print("No users found.")
     else:
-        average = total_age / count
         print(f"Average age of users: {average:.2f}")
+    return average
 
 
 if __name__ == "__main__":
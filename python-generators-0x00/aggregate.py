@@ -0,0 +1,205 @@
+import math
+
+from backends import get_backend
+
+SQL_AGGREGATES = {
+    "count": "COUNT({column})",
+    "sum": "SUM({column})",
+    "min": "MIN({column})",
+    "max": "MAX({column})",
+    "avg": "AVG({column})",
+    "var": "VAR_POP({column})",
+    "stddev": "STDDEV_POP({column})",
+}
+
+
+class RunningStats(object):
+    """
+    Streaming accumulator for count/sum/min/max/avg/var/stddev.
+    Mean and variance are updated with Welford's algorithm, so the
+    result stays numerically stable over arbitrarily long streams.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        value = float(value)
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def result(self, func):
+        if func == "count":
+            return self.count
+        if self.count == 0:
+            return None
+        if func == "sum":
+            return self.total
+        if func == "min":
+            return self.min
+        if func == "max":
+            return self.max
+        if func == "avg":
+            return self.mean
+        if func == "var":
+            return self.m2 / self.count
+        if func == "stddev":
+            return math.sqrt(self.m2 / self.count)
+        raise ValueError(f"Unsupported aggregate: {func}")
+
+
+def _normalize(func, value, ndigits):
+    """
+    Brings both paths to the same representation: counts are ints,
+    everything else a float rounded to ndigits (DECIMAL vs double noise).
+    """
+    if value is None:
+        return None
+    if func == "count":
+        return int(value)
+    return round(float(value), ndigits)
+
+
+def _select_list(funcs, column):
+    """
+    avg is fetched as SUM and COUNT and divided in Python: MySQL's AVG of
+    the DECIMAL age column is a DECIMAL cut to 4 places, which would not
+    match the streamed mean.
+    """
+    expressions = []
+    for func in funcs:
+        for part in (("sum", "count") if func == "avg" else (func,)):
+            expressions.append(SQL_AGGREGATES[part].format(column=column))
+    return ", ".join(expressions)
+
+
+def _from_row(funcs, values, ndigits):
+    values = iter(values)
+    results = {}
+    for func in funcs:
+        value = next(values)
+        if func == "avg":
+            count = next(values)
+            value = float(value) / count if count else None
+        results[func] = _normalize(func, value, ndigits)
+    return results
+
+
+def _check(funcs, column, group_by, backend):
+    for func in funcs:
+        if func not in SQL_AGGREGATES:
+            raise ValueError(f"Unsupported aggregate: {func}")
+    for name in (column, group_by):
+        if name is not None and name not in backend.columns:
+            raise ValueError(f"Unknown {backend.table} column: {name}")
+
+
+def aggregate_in_db(connection, funcs, column="age", group_by=None, ndigits=6,
+                    backend=None):
+    """
+    Pushes the aggregates down to the database: only one row per group
+    crosses the wire. Returns {func: value}, or {group: {func: value}}.
+    """
+    backend = get_backend(backend)
+    _check(funcs, column, group_by, backend)
+    for func in funcs:
+        if func not in backend.aggregates:
+            raise ValueError(f"{backend.name} cannot compute {func}")
+    select_list = _select_list(funcs, column)
+    cursor = backend.cursor(connection)
+    if group_by is None:
+        cursor.execute(f"SELECT {select_list} FROM {backend.table}")
+        row = cursor.fetchone()
+        cursor.close()
+        return _from_row(funcs, row, ndigits)
+
+    cursor.execute(
+        f"SELECT {group_by}, {select_list} FROM {backend.table} "
+        f"GROUP BY {group_by}"
+    )
+    results = {}
+    for row in cursor:
+        results[row[0]] = _from_row(funcs, row[1:], ndigits)
+    cursor.close()
+    return results
+
+
+def aggregate_stream(values, funcs, ndigits=6):
+    """
+    Aggregates an iterable of values (e.g. stream_user_ages()) in one pass.
+    """
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    return {func: _normalize(func, stats.result(func), ndigits)
+            for func in funcs}
+
+
+def aggregate_stream_grouped(pairs, funcs, ndigits=6):
+    """
+    Aggregates an iterable of (group, value) pairs in one pass.
+    """
+    groups = {}
+    for group, value in pairs:
+        stats = groups.get(group)
+        if stats is None:
+            stats = groups[group] = RunningStats()
+        stats.add(value)
+    return {group: {func: _normalize(func, stats.result(func), ndigits)
+                    for func in funcs}
+            for group, stats in groups.items()}
+
+
+def stream_column(connection, column="age", group_by=None, backend=None):
+    """
+    Generator that yields a column's values, or (group, value) pairs.
+    """
+    backend = get_backend(backend)
+    _check((), column, group_by, backend)
+    cursor = backend.cursor(connection, stream=True)
+    if group_by is None:
+        cursor.execute(f"SELECT {column} FROM {backend.table}")
+        for (value,) in cursor:
+            yield value
+    else:
+        cursor.execute(f"SELECT {group_by}, {column} FROM {backend.table}")
+        for group, value in cursor:
+            yield group, value
+    cursor.close()
+
+
+def aggregate(funcs, column="age", group_by=None, pushdown=True, ndigits=6,
+              backend=None):
+    """
+    Computes aggregates over user_data, in the database when pushdown is
+    enabled and the backend supports every requested function, and by
+    streaming the column through RunningStats otherwise (e.g. var/stddev
+    on SQLite). Both paths return the same results.
+    """
+    backend = get_backend(backend)
+    _check(funcs, column, group_by, backend)
+    connection = backend.connect()
+    try:
+        if pushdown and all(func in backend.aggregates for func in funcs):
+            return aggregate_in_db(connection, funcs, column, group_by,
+                                   ndigits, backend)
+        rows = stream_column(connection, column, group_by, backend)
+        if group_by is None:
+            return aggregate_stream(rows, funcs, ndigits)
+        return aggregate_stream_grouped(rows, funcs, ndigits)
+    finally:
+        connection.close()
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+
+from backends import get_backend
+from pagination import decode_cursor
+from query import Query
+
+
+async def _read_ahead(fetch_next, prefetch=True):
+    """
+    Async generator over successive `await fetch_next()` results, stopping
+    at the first empty one. With prefetch the next fetch is already in
+    flight while the consumer processes the current result, so database
+    I/O and processing overlap.
+    """
+    pending = asyncio.ensure_future(fetch_next())
+    try:
+        while True:
+            rows = await pending
+            pending = None
+            if not rows:
+                break
+            if prefetch:
+                pending = asyncio.ensure_future(fetch_next())
+            yield rows
+            if pending is None:
+                pending = asyncio.ensure_future(fetch_next())
+    finally:
+        if pending is not None:
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await pending
+
+
+async def stream_users_in_batches(batch_size, keyset=False, cursor=None,
+                                  stream=False, columns=None, filters=None,
+                                  backend=None, prefetch=True):
+    """
+    Async generator that yields batches of users from the database.
+    Same modes as 1-batch_processing.stream_users_in_batches (offset,
+    keyset/cursor token, single streaming query), plus read-ahead of
+    the next batch while the current one is being processed.
+    """
+    backend = get_backend(backend)
+    query = Query.build(columns, filters, backend)
+    connection = await backend.connect_async()
+    state = {"cursor": None, "offset": 0, "done": False,
+             "last_key": decode_cursor(cursor)}
+
+    async def fetch_stream():
+        if state["cursor"] is None:
+            ordered = query.order(backend.key)
+            if state["last_key"] is not None:
+                ordered = ordered.where(backend.key, ">", state["last_key"])
+            state["cursor"] = await backend.execute_async(
+                connection, *ordered.compile(), stream=True
+            )
+        return await state["cursor"].fetchmany(batch_size)
+
+    async def fetch_page():
+        if state["done"]:
+            return []
+        if keyset or cursor is not None:
+            page = query.with_column(backend.key).order(backend.key)
+            if state["last_key"] is not None:
+                page = page.where(backend.key, ">", state["last_key"])
+            page = page.limit(batch_size)
+        else:
+            page = query.limit(batch_size, state["offset"])
+        db_cursor = await backend.execute_async(connection, *page.compile())
+        rows = await db_cursor.fetchall()
+        await db_cursor.close()
+        state["offset"] += batch_size
+        if rows:
+            state["last_key"] = rows[-1][backend.key]
+        if (keyset or cursor is not None) and len(rows) < batch_size:
+            state["done"] = True
+        return rows
+
+    batches = _read_ahead(fetch_stream if stream else fetch_page, prefetch)
+    try:
+        async with contextlib.aclosing(batches):
+            async for rows in batches:
+                yield rows
+    finally:
+        await backend.close_async(connection, state["cursor"])
+
+
+async def lazy_pagination(page_size, keyset=False, cursor=None, backend=None,
+                          prefetch=True):
+    """
+    Async generator to lazily paginate user_data table, one page at a
+    time, fetching page N+1 while page N is being processed.
+    """
+    pages = stream_users_in_batches(page_size, keyset=keyset, cursor=cursor,
+                                    backend=backend, prefetch=prefetch)
+    # closed with us, not by GC: it cancels the prefetch and closes the connection
+    async with contextlib.aclosing(pages):
+        async for page in pages:
+            yield page
+
+
+async def stream_users(backend=None, batch_size=1000, prefetch=True):
+    """
+    Async generator that yields users one by one from a single streaming
+    query, reading the next chunk ahead while rows are consumed.
+    """
+    batches = stream_users_in_batches(batch_size, stream=True, backend=backend,
+                                      prefetch=prefetch)
+    async with contextlib.aclosing(batches):
+        async for batch in batches:
+            for row in batch:
+                yield row
@@ -0,0 +1,154 @@
+import sqlite3
+
+
+def _dict_row(cursor, row):
+    """
+    sqlite3 row factory that mirrors mysql.connector's dictionary cursors.
+    """
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+class MySQLBackend(object):
+    """
+    The ALX_prodev MySQL database (see seed.py).
+    Streaming cursors are unbuffered, so rows stay on the server until
+    fetched. The *_async methods use aiomysql.
+    """
+    name = "mysql"
+    placeholder = "%s"
+    table = "user_data"
+    key = "user_id"
+    columns = ("user_id", "name", "email", "age")
+    aggregates = ("count", "sum", "min", "max", "avg", "var", "stddev")
+
+    def connect(self):
+        import seed  # deferred so SQLite-only setups need no MySQL driver
+        return seed.connect_to_prodev()
+
+    def cursor(self, connection, stream=False):
+        return connection.cursor(buffered=not stream)
+
+    def dict_cursor(self, connection, stream=False):
+        return connection.cursor(dictionary=True, buffered=not stream)
+
+    def close(self, connection, cursor=None):
+        """
+        Closes cursor and connection. An unbuffered cursor abandoned with
+        rows still unread cannot be closed ("Unread result found"), so it
+        is left to the connection, whose close discards them.
+        """
+        try:
+            if cursor is not None and not connection.unread_result:
+                cursor.close()
+        finally:
+            connection.close()
+
+    async def connect_async(self):
+        import aiomysql
+        import seed
+        return await aiomysql.connect(db=seed.DB_NAME, **seed.DB_CONFIG)
+
+    async def execute_async(self, connection, sql, params=(), dictionary=True,
+                            stream=False):
+        import aiomysql
+        if dictionary:
+            cursor_class = aiomysql.SSDictCursor if stream else aiomysql.DictCursor
+        else:
+            cursor_class = aiomysql.SSCursor if stream else aiomysql.Cursor
+        cursor = await connection.cursor(cursor_class)
+        await cursor.execute(sql, params)
+        return cursor
+
+    async def close_async(self, connection, cursor=None):
+        if cursor is not None:
+            await cursor.close()
+        connection.close()
+
+
+class SQLiteBackend(object):
+    """
+    A SQLite database file, by default the repo's users.db.
+    SQLite cursors step through results lazily; arraysize sets how many
+    rows a bare fetchmany() pulls per call. The *_async methods use
+    aiosqlite.
+    """
+    name = "sqlite"
+    placeholder = "?"
+    aggregates = ("count", "sum", "min", "max", "avg")
+
+    def __init__(self, path="users.db", table="users", key="id",
+                 columns=("id", "name", "email", "age"), arraysize=1000):
+        self.path = path
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+        self.arraysize = arraysize
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def cursor(self, connection, stream=False):
+        cursor = connection.cursor()
+        cursor.arraysize = self.arraysize
+        return cursor
+
+    def dict_cursor(self, connection, stream=False):
+        cursor = self.cursor(connection, stream)
+        cursor.row_factory = _dict_row
+        return cursor
+
+    def close(self, connection, cursor=None):
+        try:
+            if cursor is not None:
+                cursor.close()
+        finally:
+            connection.close()
+
+    async def connect_async(self):
+        import aiosqlite
+        return await aiosqlite.connect(self.path)
+
+    async def execute_async(self, connection, sql, params=(), dictionary=True,
+                            stream=False):
+        connection.row_factory = _dict_row if dictionary else None
+        cursor = await connection.cursor()
+        cursor.arraysize = self.arraysize
+        await cursor.execute(sql, params)
+        return cursor
+
+    async def close_async(self, connection, cursor=None):
+        if cursor is not None:
+            await cursor.close()
+        await connection.close()
+
+
+BACKENDS = {
+    "mysql": MySQLBackend,
+    "sqlite": SQLiteBackend,
+}
+
+_default_backend = MySQLBackend()
+
+
+def set_default_backend(backend):
+    """
+    Sets the backend used by generators called without one.
+    """
+    global _default_backend
+    _default_backend = get_backend(backend)
+
+
+def get_backend(backend=None):
+    """
+    Resolves a backend argument: None means the default backend, a name
+    ("mysql", "sqlite") builds that backend with its defaults, and a
+    backend instance is returned as is.
+    """
+    if backend is None:
+        return _default_backend
+    if isinstance(backend, str):
+        try:
+            return BACKENDS[backend]()
+        except KeyError:
+            raise ValueError(f"Unknown backend: {backend}") from None
+    return backend
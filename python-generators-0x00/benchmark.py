@@ -0,0 +1,176 @@
+import sys
+import time
+import tracemalloc
+
+from aggregate import aggregate_in_db, aggregate_stream, stream_column
+from backends import get_backend
+
+lazy_paginate = __import__('2-lazy_paginate')
+batch_processing = __import__('1-batch_processing')
+
+
+def benchmark_pagination(page_size=100, checkpoints=(1, 10, 100, 1000, 10000),
+                         backend=None):
+    """
+    Compares per-page latency of OFFSET and keyset pagination.
+    OFFSET pages are fetched directly at each checkpoint; keyset pages
+    are reached by walking the table, timing the page at each checkpoint.
+    """
+    backend = get_backend(backend)
+    print(f"{'page':>8} {'offset (ms)':>14} {'keyset (ms)':>14}")
+
+    keyset_times = {}
+    last_user_id = None
+    page_number = 0
+    while page_number < max(checkpoints):
+        page_number += 1
+        start = time.perf_counter()
+        page = lazy_paginate.paginate_users_after(page_size, last_user_id,
+                                                  backend=backend)
+        elapsed = time.perf_counter() - start
+        if not page:
+            break
+        if page_number in checkpoints:
+            keyset_times[page_number] = elapsed
+        last_user_id = page[-1][backend.key]
+
+    for page_number in checkpoints:
+        if page_number not in keyset_times:
+            print(f"{page_number:>8} {'(table too small)':>29}")
+            continue
+        start = time.perf_counter()
+        lazy_paginate.paginate_users(page_size, (page_number - 1) * page_size,
+                                     backend=backend)
+        offset_time = time.perf_counter() - start
+        print(f"{page_number:>8} {offset_time * 1000:>14.2f} "
+              f"{keyset_times[page_number] * 1000:>14.2f}")
+
+
+def benchmark_aggregation(funcs=("count", "sum", "min", "max", "avg"),
+                          backend=None):
+    """
+    Compares pushed-down aggregation with the streaming fallback:
+    wall time, rows transferred, and whether the results agree.
+    """
+    backend = get_backend(backend)
+    connection = backend.connect()
+
+    start = time.perf_counter()
+    pushed = aggregate_in_db(connection, funcs, backend=backend)
+    pushed_time = time.perf_counter() - start
+
+    transferred = 0
+
+    def counted(values):
+        nonlocal transferred
+        for value in values:
+            transferred += 1
+            yield value
+
+    start = time.perf_counter()
+    streamed = aggregate_stream(
+        counted(stream_column(connection, backend=backend)), funcs
+    )
+    streamed_time = time.perf_counter() - start
+    connection.close()
+
+    print(f"{'path':>10} {'rows':>12} {'time (ms)':>12}")
+    print(f"{'pushdown':>10} {1:>12} {pushed_time * 1000:>12.2f}")
+    print(f"{'stream':>10} {transferred:>12} {streamed_time * 1000:>12.2f}")
+    print(f"results identical: {pushed == streamed}")
+
+
+def _mean_age_over_25_rows(batches):
+    total = count = 0
+    for batch in batches:
+        for user in batch:
+            age = user['age']
+            if age is not None and age > 25:
+                total += age
+                count += 1
+    return total / count if count else None
+
+
+def _mean_age_over_25_columns(batches):
+    total = count = 0
+    for batch in batches:
+        ages = batch['age']
+        if hasattr(ages, "dtype"):
+            selected = ages[ages > 25]  # NaN (NULL) compares False
+            total += float(selected.sum())
+            count += len(selected)
+        else:
+            selected = [age for age in ages if age > 25]
+            total += sum(selected)
+            count += len(selected)
+    return total / count if count else None
+
+
+def benchmark_columnar(batch_size=1000, backend=None):
+    """
+    Compares dict-row batches with columnar batches on the same job
+    (mean age of users over 25): peak traced memory and wall time.
+    """
+    backend = get_backend(backend)
+    modes = (
+        ("dict rows", {}, _mean_age_over_25_rows),
+        ("array.array", {"columnar": True, "use_numpy": False},
+         _mean_age_over_25_columns),
+    )
+    try:
+        import numpy  # noqa: F401
+        modes += (("numpy", {"columnar": True, "use_numpy": True},
+                   _mean_age_over_25_columns),)
+    except ImportError:
+        pass
+
+    print(f"{'mode':>12} {'peak (KiB)':>12} {'time (ms)':>12} {'result':>10}")
+    for label, options, job in modes:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = job(batch_processing.stream_users_in_batches(
+            batch_size, stream=True, backend=backend, **options
+        ))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        shown = "-" if result is None else f"{float(result):.2f}"
+        print(f"{label:>12} {peak / 1024:>12.1f} {elapsed * 1000:>12.2f} "
+              f"{shown:>10}")
+
+
+def benchmark_prefetch(page_size=1000, process_seconds=0.002, depth=2,
+                       backend=None):
+    """
+    Times a page-by-page job whose processing step takes process_seconds
+    per page, with and without read-ahead. Without prefetching the total
+    is fetch + process; with it, it approaches max(fetch, process).
+    """
+    backend = get_backend(backend)
+
+    start = time.perf_counter()
+    pages = sum(1 for _ in lazy_paginate.lazy_pagination(
+        page_size, keyset=True, backend=backend
+    ))
+    fetch_time = time.perf_counter() - start
+    process_time = pages * process_seconds
+
+    print(f"{'prefetch':>9} {'total (ms)':>12}   "
+          f"fetch {fetch_time * 1000:.2f} ms, process {process_time * 1000:.2f} ms")
+    for prefetch in (0, depth):
+        start = time.perf_counter()
+        for _ in lazy_paginate.lazy_pagination(page_size, keyset=True,
+                                               backend=backend,
+                                               prefetch=prefetch):
+            time.sleep(process_seconds)
+        elapsed = time.perf_counter() - start
+        print(f"{prefetch:>9} {elapsed * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    # python benchmark.py [mysql|sqlite]
+    backend = get_backend(sys.argv[1] if len(sys.argv) > 1 else None)
+    benchmark_pagination(backend=backend)
+    benchmark_aggregation(backend=backend)
+    benchmark_columnar(backend=backend)
+    benchmark_prefetch(backend=backend)
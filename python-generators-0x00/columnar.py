@@ -0,0 +1,70 @@
+from array import array
+from decimal import Decimal
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, array.array is the fallback
+    numpy = None
+
+
+def _numeric_kind(values, nullable=True):
+    """
+    Returns "int" or "float" when every value in the column is numeric,
+    or None when the column has to stay a plain list (e.g. strings).
+    Nullable columns are always "float" (NULLs become NaN), so a column
+    keeps the same type in every batch whether or not it holds a NULL.
+    """
+    kind = "float" if nullable else "int"
+    for value in values:
+        if value is None:
+            kind = "float"
+        elif isinstance(value, bool):
+            return None
+        elif isinstance(value, int):
+            continue
+        elif isinstance(value, (float, Decimal)):
+            kind = "float"
+        else:
+            return None
+    return kind
+
+
+def _to_array(values, kind, use_numpy):
+    if kind == "float":
+        values = [float("nan") if value is None else float(value)
+                  for value in values]
+    if use_numpy:
+        return numpy.array(values, dtype="int64" if kind == "int" else "float64")
+    return array("q" if kind == "int" else "d", values)
+
+
+def to_columns(names, rows, use_numpy=None, nullable=None):
+    """
+    Converts a batch of row tuples into {column: values}. Numeric columns
+    become typed arrays (NumPy when available, array.array otherwise),
+    other columns stay lists. nullable names the columns that may hold
+    NULL (see nullable_columns); None treats every column as nullable.
+    Only NOT NULL integer columns become int arrays.
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError("use_numpy=True requires NumPy")
+
+    columns = {}
+    for name, values in zip(names, zip(*rows)):
+        kind = _numeric_kind(values, nullable is None or name in nullable)
+        if kind is None:
+            columns[name] = list(values)
+        else:
+            columns[name] = _to_array(values, kind, use_numpy)
+    return columns
+
+
+def nullable_columns(description):
+    """
+    Names of the columns a cursor description does not mark NOT NULL.
+    sqlite3 leaves null_ok unset, so all of its columns count as nullable.
+    """
+    return {column[0] for column in description
+            if column[6] is None or column[6]}
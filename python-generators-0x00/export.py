@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+from decimal import Decimal
+
+from backends import get_backend
+from pagination import encode_cursor
+
+batch_processing = __import__('1-batch_processing')
+
+CHECKPOINT = "checkpoint.json"
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def _write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=_json_default))
+            f.write("\n")
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _write_parquet(path, rows):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow") from None
+    rows = [{name: _json_default(value) if isinstance(value, Decimal) else value
+             for name, value in row.items()} for row in rows]
+    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+
+
+WRITERS = {
+    "jsonl": _write_jsonl,
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+}
+
+
+def _atomic_write(path, write, *args):
+    """
+    Writes through a temporary file and renames it into place, so a crash
+    never leaves a half-written chunk or checkpoint behind.
+    """
+    tmp_path = f"{path}.tmp"
+    write(tmp_path, *args)
+    os.replace(tmp_path, path)
+
+
+def _write_checkpoint(path, checkpoint):
+    def write(tmp_path, data):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+    _atomic_write(path, write, checkpoint)
+
+
+def load_checkpoint(directory):
+    """
+    Returns the export checkpoint saved in directory, or None.
+    """
+    path = os.path.join(directory, CHECKPOINT)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def chunk_path(directory, chunk, fmt):
+    return os.path.join(directory, f"users-{chunk:05d}.{fmt}")
+
+
+def export_users(directory, fmt="jsonl", chunk_size=10000, columns=None,
+                 filters=None, backend=None):
+    """
+    Exports users into numbered chunk files under directory, streaming in
+    primary key order. After every chunk a checkpoint (last key, next
+    chunk number, rows written) is saved, so calling export_users again
+    after a crash resumes right after the last completed chunk instead of
+    starting over. Returns the final checkpoint.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    backend = get_backend(backend)
+    os.makedirs(directory, exist_ok=True)
+    checkpoint_path = os.path.join(directory, CHECKPOINT)
+
+    checkpoint = load_checkpoint(directory)
+    if checkpoint is None:
+        checkpoint = {"format": fmt, "last_key": None, "chunk": 0,
+                      "rows": 0, "done": False}
+    elif checkpoint["format"] != fmt:
+        raise ValueError(f"{directory} holds a {checkpoint['format']} export")
+    if checkpoint["done"]:
+        return checkpoint
+
+    resume = None
+    if checkpoint["last_key"] is not None:
+        resume = encode_cursor(checkpoint["last_key"])
+    if columns is not None and backend.key not in columns:
+        columns = tuple(columns) + (backend.key,)
+
+    batches = batch_processing.stream_users_in_batches(
+        chunk_size, cursor=resume, stream=True, columns=columns,
+        filters=filters, backend=backend
+    )
+    for rows in batches:
+        _atomic_write(chunk_path(directory, checkpoint["chunk"], fmt),
+                      WRITERS[fmt], rows)
+        checkpoint["last_key"] = rows[-1][backend.key]
+        checkpoint["chunk"] += 1
+        checkpoint["rows"] += len(rows)
+        _write_checkpoint(checkpoint_path, checkpoint)
+
+    checkpoint["done"] = True
+    _write_checkpoint(checkpoint_path, checkpoint)
+    return checkpoint
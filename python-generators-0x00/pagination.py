@@ -0,0 +1,51 @@
+import base64
+import json
+
+from backends import get_backend
+from query import Query
+
+
+def encode_cursor(last_key):
+    """
+    Encodes the last seen user_id as an opaque, URL-safe cursor token.
+    """
+    payload = json.dumps({"after": last_key}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(token):
+    """
+    Decodes a cursor token back to the last seen user_id.
+    A missing token means "start from the beginning".
+    """
+    if token is None:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))["after"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {token!r}") from e
+
+
+def next_cursor(page, backend=None):
+    """
+    Returns the cursor token that resumes right after the given page.
+    """
+    if not page:
+        return None
+    return encode_cursor(page[-1][get_backend(backend).key])
+
+
+def fetch_page_after(cursor, page_size, last_key=None, query=None,
+                     backend=None):
+    """
+    Fetches one page with a keyset (seek) predicate instead of OFFSET.
+    The primary key index lets the database jump straight to last_key,
+    so every page costs the same no matter how deep into the table it is.
+    An optional Query narrows the columns and rows of each page.
+    """
+    query = query or Query(backend=backend)
+    query = query.with_column(query.key).order(query.key)
+    if last_key is not None:
+        query = query.where(query.key, ">", last_key)
+    cursor.execute(*query.limit(page_size).compile())
+    return cursor.fetchall()
@@ -0,0 +1,139 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend
+from query import Query
+
+_DONE = object()
+
+
+def partition_bounds(connection, partitions, backend=None):
+    """
+    Splits user_data into contiguous primary key ranges of roughly equal
+    size. Returns (low, high) pairs where low is exclusive, high inclusive
+    and None means the range is open on that side.
+    """
+    backend = get_backend(backend)
+    cursor = backend.cursor(connection)
+    cursor.execute(f"SELECT COUNT(*) FROM {backend.table}")
+    (total,) = cursor.fetchone()
+    step = -(-total // partitions) if total else 0
+
+    splits = []
+    for i in range(1, partitions):
+        if not step or i * step >= total:
+            break
+        query = Query(backend=backend).select(backend.key).order(backend.key)
+        cursor.execute(*query.limit(1, i * step - 1).compile())
+        splits.append(cursor.fetchone()[0])
+    cursor.close()
+
+    edges = [None] + splits + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _put(out, item, stop):
+    """
+    Blocking put that gives up once the consumer has gone away.
+    """
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _scan_range(query, low, high, batch_size, out, stop):
+    """
+    Streams one key range over its own connection into the out queue,
+    finishing with _DONE (or the exception that stopped it).
+    """
+    try:
+        backend = query.backend
+        connection = backend.connect()
+        cursor = None
+        try:
+            cursor = backend.dict_cursor(connection, stream=True)
+            query = query.order(backend.key)
+            if low is not None:
+                query = query.where(backend.key, ">", low)
+            if high is not None:
+                query = query.where(backend.key, "<=", high)
+            cursor.execute(*query.compile())
+            while not stop.is_set():
+                rows = cursor.fetchmany(batch_size)
+                if not rows or not _put(out, rows, stop):
+                    break
+        finally:
+            backend.close(connection, cursor)
+    except Exception as e:
+        _put(out, e, stop)
+        return
+    _put(out, _DONE, stop)
+
+
+def partitioned_scan(partitions=4, batch_size=1000, ordered=False,
+                     queue_depth=4, columns=None, filters=None, backend=None):
+    """
+    Generator that scans user_data through `partitions` concurrent
+    connections and yields batches of rows as one stream.
+
+    With ordered=True batches come out in primary key order (later
+    partitions prefetch up to queue_depth batches meanwhile); otherwise
+    they are yielded as soon as any partition produces them.
+    columns and filters are pushed down into every range query.
+    """
+    backend = get_backend(backend)
+    query = Query.build(columns, filters, backend)
+    connection = backend.connect()
+    ranges = partition_bounds(connection, partitions, backend)
+    connection.close()
+
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=queue_depth) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=queue_depth * len(ranges))
+        queues = [shared] * len(ranges)
+
+    executor = ThreadPoolExecutor(max_workers=len(ranges))
+    try:
+        for (low, high), out in zip(ranges, queues):
+            executor.submit(_scan_range, query, low, high, batch_size, out, stop)
+
+        if ordered:
+            for out in queues:
+                while True:
+                    item = out.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        else:
+            remaining = len(ranges)
+            while remaining:
+                item = shared.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+def stream_users_partitioned(partitions=4, batch_size=1000, ordered=False,
+                             columns=None, filters=None, backend=None):
+    """
+    Generator that yields single user rows from a partitioned scan.
+    """
+    for batch in partitioned_scan(partitions, batch_size, ordered,
+                                  columns=columns, filters=filters,
+                                  backend=backend):
+        yield from batch
@@ -0,0 +1,216 @@
+import collections
+import time
+
+
+class StageStats(object):
+    """
+    Metrics collected for one pipeline stage.
+
+    upstream_seconds is time spent waiting for the previous stage to
+    produce an item, downstream_seconds is time spent suspended at yield
+    while the next stage works; whatever remains is the stage's own work.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.upstream_seconds = 0.0
+        self.downstream_seconds = 0.0
+        self.peak_buffered = 0
+        self.started = None
+        self.finished = None
+
+    def buffered(self, count):
+        if count > self.peak_buffered:
+            self.peak_buffered = count
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def own_seconds(self):
+        return max(self.elapsed - self.upstream_seconds - self.downstream_seconds, 0.0)
+
+    @property
+    def items_per_second(self):
+        return self.items_out / self.elapsed if self.elapsed else 0.0
+
+
+def _timed_upstream(upstream, stats):
+    """
+    Iterates upstream, charging the wait for each item to stats.
+    """
+    iterator = iter(upstream)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stats.upstream_seconds += time.perf_counter() - start
+            return
+        stats.upstream_seconds += time.perf_counter() - start
+        stats.items_in += 1
+        yield item
+
+
+def _run_stage(upstream, stats, transform):
+    """
+    Drives transform over the timed upstream and records the time spent
+    handing each output item downstream.
+    """
+    stats.started = time.perf_counter()
+    try:
+        for item in transform(_timed_upstream(upstream, stats)):
+            stats.items_out += 1
+            start = time.perf_counter()
+            yield item
+            stats.downstream_seconds += time.perf_counter() - start
+    finally:
+        stats.finished = time.perf_counter()
+
+
+def _source(items):
+    yield from items
+
+
+class Pipeline(object):
+    """
+    Lazy chain of generator stages with per-stage throughput metrics.
+
+        users = Pipeline(stream_users())
+        names = users.filter(lambda u: u['age'] > 25).map(lambda u: u['name'])
+        for batch in names.batch(100):
+            ...
+        print(names.report())
+
+    Nothing runs until the pipeline is iterated. Each combinator returns a
+    new Pipeline sharing the stats of the stages before it.
+    """
+
+    def __init__(self, source, name="source", _stats=None):
+        self.stats = list(_stats or [])
+        if _stats is None:
+            stats = StageStats(name)
+            self.stats.append(stats)
+            self._iterator = _run_stage(source, stats, _source)
+        else:
+            self._iterator = source
+
+    def _then(self, name, transform):
+        stats = StageStats(name)
+        return Pipeline(_run_stage(self._iterator, stats,
+                                   lambda items: transform(items, stats)),
+                        _stats=self.stats + [stats])
+
+    def __iter__(self):
+        return self._iterator
+
+    def map(self, func, name="map"):
+        def transform(items, stats):
+            for item in items:
+                yield func(item)
+        return self._then(name, transform)
+
+    def filter(self, predicate, name="filter"):
+        def transform(items, stats):
+            for item in items:
+                if predicate(item):
+                    yield item
+        return self._then(name, transform)
+
+    def batch(self, size, name="batch"):
+        def transform(items, stats):
+            batch = []
+            for item in items:
+                batch.append(item)
+                stats.buffered(len(batch))
+                if len(batch) == size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return self._then(name, transform)
+
+    def unbatch(self, name="unbatch"):
+        def transform(batches, stats):
+            for batch in batches:
+                stats.buffered(len(batch))
+                yield from batch
+        return self._then(name, transform)
+
+    def window(self, size, step=1, name="window"):
+        """
+        Sliding windows of size items, advancing step items at a time.
+        """
+        def transform(items, stats):
+            window = collections.deque(maxlen=size)
+            pending = 0
+            for item in items:
+                window.append(item)
+                stats.buffered(len(window))
+                pending += 1
+                if len(window) == size and pending >= step:
+                    pending = 0
+                    yield tuple(window)
+        return self._then(name, transform)
+
+    def take(self, n, name="take"):
+        def transform(items, stats):
+            if n <= 0:
+                return
+            for count, item in enumerate(items, 1):
+                yield item
+                if count >= n:
+                    return
+        return self._then(name, transform)
+
+    def tee(self, n=2, name="tee"):
+        """
+        Splits the pipeline into n independent pipelines. Items consumed
+        by one branch but not yet by the others are buffered; the peak of
+        that buffer shows how far the branches drift apart.
+        """
+        stats = StageStats(name)
+        upstream = _run_stage(self._iterator, stats, lambda items: items)
+        buffers = [collections.deque() for _ in range(n)]
+
+        def branch(own):
+            while True:
+                if not own:
+                    try:
+                        item = next(upstream)
+                    except StopIteration:
+                        return
+                    for buffer in buffers:
+                        buffer.append(item)
+                    stats.buffered(max(len(buffer) for buffer in buffers))
+                yield own.popleft()
+
+        shared = self.stats + [stats]
+        return [Pipeline(branch(buffer), _stats=shared) for buffer in buffers]
+
+    def run(self):
+        """
+        Drains the pipeline and returns the number of items it produced.
+        """
+        return sum(1 for _ in self)
+
+    def report(self):
+        """
+        Returns a table of per-stage metrics, source first.
+        """
+        lines = [f"{'stage':<12} {'in':>10} {'out':>10} {'items/s':>12} "
+                 f"{'upstream s':>11} {'downstream s':>13} {'own s':>9} "
+                 f"{'peak buf':>9}"]
+        for stats in self.stats:
+            lines.append(
+                f"{stats.name:<12} {stats.items_in:>10} {stats.items_out:>10} "
+                f"{stats.items_per_second:>12.1f} {stats.upstream_seconds:>11.4f} "
+                f"{stats.downstream_seconds:>13.4f} {stats.own_seconds:>9.4f} "
+                f"{stats.peak_buffered:>9}"
+            )
+        return "\n".join(lines)
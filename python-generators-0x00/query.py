@@ -0,0 +1,124 @@
+from backends import get_backend
+
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "LIKE", "IN")
+
+
+class Query(object):
+    """
+    Small immutable SELECT builder for the users table of a backend.
+
+    Filters and projections are compiled into the SQL with bound
+    parameters, so only matching rows and requested columns leave the
+    database. Column names and operators are whitelisted because they
+    cannot be bound as parameters; the table, key and placeholder style
+    come from the backend.
+
+        Query().select("name", "age").where("age", ">", 25).compile()
+        -> ("SELECT name, age FROM user_data WHERE age > %s", (25,))
+    """
+
+    def __init__(self, columns=None, filters=(), order_by=None, limit=None,
+                 offset=None, backend=None):
+        self.backend = get_backend(backend)
+        self.columns = tuple(columns) if columns else None
+        self.filters = tuple(filters)
+        self.order_by = order_by
+        self.row_limit = limit
+        self.row_offset = offset
+        for column in self.columns or ():
+            self._check_column(column)
+        for column, op, _ in self.filters:
+            self._check_column(column)
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {op}")
+        if order_by is not None:
+            self._check_column(order_by)
+
+    @classmethod
+    def build(cls, columns=None, filters=None, backend=None):
+        """
+        Builds a query from the loose arguments the generators accept:
+        filters may be (column, op, value) tuples or a {column: value}
+        dict of equality tests.
+        """
+        if isinstance(filters, dict):
+            filters = [(column, "=", value) for column, value in filters.items()]
+        normalized = []
+        for column, op, value in filters or ():
+            normalized.append((column, op.upper(), value))
+        return cls(columns, normalized, backend=backend)
+
+    def _check_column(self, column):
+        if column not in self.backend.columns:
+            raise ValueError(f"Unknown {self.backend.table} column: {column}")
+
+    def _replace(self, **changes):
+        fields = {
+            "columns": self.columns,
+            "filters": self.filters,
+            "order_by": self.order_by,
+            "limit": self.row_limit,
+            "offset": self.row_offset,
+            "backend": self.backend,
+        }
+        fields.update(changes)
+        return Query(**fields)
+
+    @property
+    def key(self):
+        return self.backend.key
+
+    def select(self, *columns):
+        return self._replace(columns=columns)
+
+    def where(self, column, op, value):
+        return self._replace(filters=self.filters + ((column, op.upper(), value),))
+
+    def order(self, column):
+        return self._replace(order_by=column)
+
+    def limit(self, limit, offset=None):
+        return self._replace(limit=limit, offset=offset)
+
+    def with_column(self, column):
+        """
+        Makes sure column is projected (keyset scans need the key).
+        """
+        if self.columns is None or column in self.columns:
+            return self
+        return self._replace(columns=self.columns + (column,))
+
+    def compile(self):
+        """
+        Returns (sql, params) ready for cursor.execute.
+        """
+        mark = self.backend.placeholder
+        select_list = ", ".join(self.columns) if self.columns else "*"
+        sql = f"SELECT {select_list} FROM {self.backend.table}"
+        params = []
+
+        conditions = []
+        for column, op, value in self.filters:
+            if op == "IN":
+                values = tuple(value)
+                if not values:
+                    conditions.append("1 = 0")
+                    continue
+                placeholders = ", ".join([mark] * len(values))
+                conditions.append(f"{column} IN ({placeholders})")
+                params.extend(values)
+            else:
+                conditions.append(f"{column} {op} {mark}")
+                params.append(value)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        if self.order_by is not None:
+            sql += f" ORDER BY {self.order_by}"
+        if self.row_limit is not None:
+            sql += f" LIMIT {mark}"
+            params.append(self.row_limit)
+            if self.row_offset:
+                sql += f" OFFSET {mark}"
+                params.append(self.row_offset)
+        return sql, tuple(params)
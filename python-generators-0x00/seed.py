@@ -1,3 +1,168 @@
+import csv
+import time
+import uuid
+
+import mysql.connector
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "your_mysql_user",
+    "password": "your_mysql_password",
+}
+DB_NAME = "ALX_prodev"
+
+
+def connect_db():
+    """
+    Connects to the MySQL server (no database selected).
+    """
+    try:
+        return mysql.connector.connect(**DB_CONFIG)
+    except mysql.connector.Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+
+def create_database(connection):
+    """
+    Creates the ALX_prodev database if it does not exist.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
+    cursor.close()
+
+
+def connect_to_prodev(allow_local_infile=False):
+    """
+    Connects to the ALX_prodev database.
+    """
+    try:
+        return mysql.connector.connect(
+            database=DB_NAME,
+            allow_local_infile=allow_local_infile,
+            **DB_CONFIG
+        )
+    except mysql.connector.Error as e:
+        print(f"Error connecting to {DB_NAME}: {e}")
+        return None
+
+
+def create_table(connection):
+    """
+    Creates the user_data table if it does not exist.
+    email is the natural key used to deduplicate loads.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_data (
+            user_id CHAR(36) NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL(3, 0) NOT NULL,
+            UNIQUE KEY uq_user_data_email (email),
+            INDEX idx_user_data_age (age)
+        )
+    """)
+    connection.commit()
+    cursor.close()
+
+
+def read_csv_rows(path):
+    """
+    Generator that yields (user_id, name, email, age) tuples from the CSV
+    one line at a time, so the file is never held in memory.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            yield (str(uuid.uuid4()), record["name"], record["email"],
+                   record["age"])
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _load_data_infile(connection, path):
+    """
+    Bulk loads the CSV server-side with LOAD DATA LOCAL INFILE.
+    Duplicate emails are skipped by the IGNORE modifier.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        (name, email, age)
+        SET user_id = UUID()
+    """, (path,))
+    inserted = cursor.rowcount
+    connection.commit()
+    cursor.close()
+    return inserted
+
+
+def insert_data(connection, data, chunk_size=1000, chunks_per_commit=10,
+                use_load_data=False):
+    """
+    Streams the CSV file at path `data` into user_data.
+
+    Rows are sent with executemany in chunks of chunk_size and committed
+    every chunks_per_commit chunks; rows whose email already exists are
+    skipped (INSERT IGNORE on the unique natural key). With use_load_data
+    the server-side LOAD DATA LOCAL INFILE path is tried first (the
+    connection needs allow_local_infile=True).
+    Returns a dict with rows read, rows inserted and rows/second.
+    """
+    start = time.perf_counter()
+
+    if use_load_data:
+        try:
+            inserted = _load_data_infile(connection, data)
+            elapsed = time.perf_counter() - start
+            print(f"Loaded {inserted} rows via LOAD DATA "
+                  f"({inserted / elapsed if elapsed else 0:.0f} rows/s)")
+            return {"read": None, "inserted": inserted,
+                    "rows_per_second": inserted / elapsed if elapsed else 0}
+        except mysql.connector.Error as e:
+            connection.rollback()
+            print(f"LOAD DATA unavailable ({e}), falling back to executemany")
+            start = time.perf_counter()
+
+    cursor = connection.cursor()
+    read = inserted = 0
+    try:
+        for n, chunk in enumerate(_chunks(read_csv_rows(data), chunk_size), 1):
+            cursor.executemany(
+                "INSERT IGNORE INTO user_data (user_id, name, email, age) "
+                "VALUES (%s, %s, %s, %s)",
+                chunk
+            )
+            read += len(chunk)
+            inserted += max(cursor.rowcount, 0)
+            if n % chunks_per_commit == 0:
+                connection.commit()
+        connection.commit()
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    rate = read / elapsed if elapsed else 0
+    print(f"Read {read} rows, inserted {inserted} "
+          f"({read - inserted} duplicates skipped) at {rate:.0f} rows/s")
+    return {"read": read, "inserted": inserted, "rows_per_second": rate}
+
+
 def stream_user_data(connection):
     """
     Generator that yields user_data rows one by one.